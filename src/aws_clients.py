@@ -0,0 +1,95 @@
+"""
+shared boto3 clients for all providers.
+
+Clients are created on first use from a single boto3 session and shared between the providers,
+so each service model is loaded and each connection pool is opened only once per container.
+All clients use the same botocore configuration for the connection pool, keep-alive and timeouts.
+Callers which retry their calls themselves use separate clients without the retries of botocore.
+
+The clients are kept in a bounded LRU cache, so that requests for parameters in many regions
+reuse warm connections without growing the cache without limit. Independent API calls of a
+request run concurrently on a shared thread pool, no larger than the connection pool.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+config = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=20,
+)
+
+# the configuration of the clients without retries, which make a single attempt per call
+no_retries = config.merge(Config(retries={"max_attempts": 0}))
+
+max_clients = 16
+
+_lock = threading.RLock()
+_session = None
+_clients = OrderedDict()
+_executor = None
+
+
+def session():
+    """
+    returns the boto3 session shared by all clients.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = boto3.session.Session()
+    return _session
+
+
+def client(service_name, region_name=None, credentials=None, retries=True):
+    """
+    returns the shared client for `service_name` in `region_name` (default the session region).
+    `credentials` is an optional dictionary with aws_access_key_id, aws_secret_access_key and
+    aws_session_token, to obtain a client with credentials other than those of the session.
+    With `retries` False, the client does not retry failed calls.
+    """
+    region_name = region_name or session().region_name
+    key = (
+        service_name,
+        region_name,
+        tuple(sorted(credentials.items())) if credentials else None,
+        retries,
+    )
+    with _lock:
+        result = _clients.get(key)
+        if result is not None:
+            _clients.move_to_end(key)
+            return result
+
+        # boto3 sessions are not thread safe, so clients are created under the lock
+        result = session().client(
+            service_name,
+            region_name=region_name,
+            config=config if retries else no_retries,
+            **(credentials or {})
+        )
+        _clients[key] = result
+        while len(_clients) > max_clients:
+            _clients.popitem(last=False)
+        return result
+
+
+def executor():
+    """
+    returns the thread pool shared by all providers for concurrent API calls.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.max_pool_connections,
+                    thread_name_prefix="aws-clients",
+                )
+    return _executor
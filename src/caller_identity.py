@@ -0,0 +1,72 @@
+"""
+resolves the account id and region the provider runs in, once per container.
+
+The values are taken from the invoked function Arn in the Lambda context or the ServiceToken
+of the request. Only when neither is available, a single STS GetCallerIdentity call is made.
+"""
+import logging
+import re
+import threading
+
+import aws_clients
+
+log = logging.getLogger()
+
+_lock = threading.Lock()
+_identity = {}
+
+
+def from_arn(arn):
+    """
+    returns the tuple (region, account_id) from the `arn`, or None if the arn does not specify both.
+    """
+    m = arn_regexp.match(arn) if isinstance(arn, str) else None
+    return (m.group("region"), m.group("account")) if m else None
+
+
+def resolve(request, context):
+    """
+    sets the region and account id from the invoked function arn in `context` or the
+    ServiceToken in the `request`, if not already known.
+    """
+    if "account_id" in _identity:
+        return
+
+    for arn in [
+        getattr(context, "invoked_function_arn", None),
+        request.get("ServiceToken"),
+    ]:
+        identity = from_arn(arn)
+        if identity:
+            with _lock:
+                _identity.setdefault("region", identity[0])
+                _identity.setdefault("account_id", identity[1])
+            return
+
+
+def account_id():
+    """
+    returns the account id, calling STS if it has not been resolved from a request.
+    """
+    if "account_id" not in _identity:
+        with _lock:
+            if "account_id" not in _identity:
+                log.debug("resolving account id with sts:GetCallerIdentity")
+                sts = aws_clients.client("sts")
+                _identity["account_id"] = sts.get_caller_identity()["Account"]
+    return _identity["account_id"]
+
+
+def region():
+    """
+    returns the region, defaulting to the region of the boto3 session.
+    """
+    if "region" not in _identity:
+        with _lock:
+            _identity.setdefault("region", aws_clients.session().region_name)
+    return _identity["region"]
+
+
+arn_regexp = re.compile(
+    r"arn:(?P<partition>[^:]+):(?P<service>[^:]+):(?P<region>[a-z0-9\-]+):(?P<account>[0-9]{12}):"
+)
@@ -1,12 +1,16 @@
 import base64
-import boto3
 import hashlib
 import hmac
+import json
 import logging
 import re
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
+import write_scheduler
+
 log = logging.getLogger(__name__)
 
 request_schema = {
@@ -59,18 +63,55 @@ request_schema = {
             "type": "string",
             "description": "to generate the SMTP password for",
         },
+        "SMTPRegions": {
+            "type": "array",
+            "items": {"type": "string"},
+            "uniqueItems": True,
+            "description": "to generate additional SMTP passwords for",
+        },
+        "StorageFormat": {
+            "type": "string",
+            "default": "parameters",
+            "enum": ["parameters", "json"],
+            "description": "of the credentials in the parameter store",
+        },
     },
 }
 
 
+# the names of the parameters under the ParameterPath, by the attribute they hold
+parameter_names = {
+    "AccessKeyId": "aws_access_key_id",
+    "SecretAccessKey": "aws_secret_access_key",
+    "SMTPPassword": "smtp_password",
+}
+
+
 class AccessKeyProvider(ResourceProvider):
     def __init__(self):
         super(AccessKeyProvider, self).__init__()
         self.request_schema = request_schema
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
-        self.iam = boto3.client("iam")
-        self.ssm = boto3.client("ssm")
+        self._smtp_passwords = {}
+
+    def set_request(self, request, context):
+        super(AccessKeyProvider, self).set_request(request, context)
+        self._smtp_passwords = {}
+
+    @property
+    def iam(self):
+        return aws_clients.client("iam")
+
+    @property
+    def ssm(self):
+        return aws_clients.client("ssm")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     def convert_property_types(self):
         self.heuristic_convert_property_types(self.properties)
@@ -80,24 +121,46 @@ class AccessKeyProvider(ResourceProvider):
     def smtp_region(self):
         return self.get("SMTPRegion", self.region)
 
+    @property
+    def smtp_regions(self):
+        """
+        the SMTPRegion, followed by the other SMTPRegions.
+        """
+        regions = [self.smtp_region]
+        regions.extend(r for r in self.get("SMTPRegions", []) if r != self.smtp_region)
+        return regions
+
     def sign(self, key, msg):
         return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
 
-    def hash_secret(self, key):
+    def smtp_passwords(self, key) -> dict:
+        """
+        returns the SMTP passwords of the secret `key` by SMTP region. The first signing step
+        does not depend on the region, and is done once for all regions. The passwords are
+        memoized for the request.
+        """
         date = "11111111"
         service = "ses"
         message = "SendRawEmail"
         terminal = "aws4_request"
         version = 0x04
 
-        signature = self.sign(("AWS4" + key).encode("utf-8"), date)
-        signature = self.sign(signature, self.smtp_region)
-        signature = self.sign(signature, service)
-        signature = self.sign(signature, terminal)
-        signature = self.sign(signature, message)
-        signature_and_version = bytes([version]) + signature
-        smtp_password = base64.b64encode(signature_and_version)
-        return smtp_password.decode("utf-8")
+        regions = [r for r in self.smtp_regions if (key, r) not in self._smtp_passwords]
+        if regions:
+            date_key = self.sign(("AWS4" + key).encode("utf-8"), date)
+            for region in regions:
+                signature = self.sign(date_key, region)
+                signature = self.sign(signature, service)
+                signature = self.sign(signature, terminal)
+                signature = self.sign(signature, message)
+                signature_and_version = bytes([version]) + signature
+                smtp_password = base64.b64encode(signature_and_version)
+                self._smtp_passwords[(key, region)] = smtp_password.decode("utf-8")
+
+        return {r: self._smtp_passwords[(key, r)] for r in self.smtp_regions}
+
+    def hash_secret(self, key):
+        return self.smtp_passwords(key)[self.smtp_region]
 
     def delete_access_key(self, access_key):
         try:
@@ -119,11 +182,12 @@ class AccessKeyProvider(ResourceProvider):
         try:
             response = self.iam.create_access_key(UserName=user_name)
             access_key = response["AccessKey"]
-            self.iam.update_access_key(
-                UserName=user_name,
-                AccessKeyId=access_key["AccessKeyId"],
-                Status=self.get("Status"),
-            )
+            if self.get("Status") != access_key.get("Status", "Active"):
+                self.iam.update_access_key(
+                    UserName=user_name,
+                    AccessKeyId=access_key["AccessKeyId"],
+                    Status=self.get("Status"),
+                )
         except ClientError:
             if access_key is not None:
                 self.delete_access_key(access_key)
@@ -142,93 +206,212 @@ class AccessKeyProvider(ResourceProvider):
     def old_parameter_path(self):
         return self.get_old("ParameterPath", self.get("ParameterPath")).rstrip("/ \t")
 
+    @property
+    def storage_format(self):
+        return self.get("StorageFormat", "parameters")
+
+    @property
+    def old_storage_format(self):
+        return self.get_old("StorageFormat", "parameters")
+
+    @staticmethod
+    def storage_names(parameter_path, storage_format):
+        """
+        returns the names of the parameters of `storage_format` under `parameter_path`.
+        """
+        if storage_format == "json":
+            return [parameter_path]
+        return ["{}/{}".format(parameter_path, n) for n in parameter_names.values()]
+
+    def get_parameters(self, parameter_path, with_decryption):
+        """
+        returns the values of the parameters of both storage formats under `parameter_path`
+        by name, in a single call.
+        """
+        names = self.storage_names(parameter_path, "json") + self.storage_names(
+            parameter_path, "parameters"
+        )
+        response = self.ssm.get_parameters(Names=names, WithDecryption=with_decryption)
+        return {p["Name"]: p["Value"] for p in response["Parameters"]}
+
     def check_parameter_path_exists(self):
-        for suffix in [
-            "/aws_access_key_id",
-            "/aws_secret_access_key",
-            "/smtp_password",
-        ]:
+        parameters = self.get_parameters(self.parameter_path, False)
+        for storage_format in ["json", "parameters"]:
+            for name in self.storage_names(self.parameter_path, storage_format):
+                if name in parameters:
+                    self.fail("parameter {} already exists.".format(name))
+                    return True
+        return False
+
+    def find_access_keys(self, parameter_path, parameters=None) -> dict:
+        """
+        returns the access keys stored under `parameter_path` by storage format, from the
+        decrypted `parameters` under the path by name if they were read before.
+        """
+        if parameters is None:
+            parameters = self.get_parameters(parameter_path, True)
+        result = {}
+        if parameter_path in parameters:
             try:
-                name = f"{self.parameter_path}{suffix}"
-                self.ssm.get_parameter(Name=name)
-                self.fail("parameter {} already exists.".format(name))
-                return True
-            except ClientError as e:
-                if e.response["Error"]["Code"] != "ParameterNotFound":
-                    raise
+                value = json.loads(parameters[parameter_path])
+                required = {"AccessKeyId", "SecretAccessKey"}
+                if isinstance(value, dict) and required <= set(value):
+                    result["json"] = value
+                else:
+                    log.error("parameter %s is not an access key", parameter_path)
+            except ValueError as e:
+                log.error("parameter %s is not an access key, %s", parameter_path, e)
+
+        names = {
+            "{}/{}".format(parameter_path, n): a for a, n in parameter_names.items()
+        }
+        missing = [n for n in names if n not in parameters]
+        if not missing:
+            result["parameters"] = {names[n]: parameters[n] for n in names}
+        elif "json" not in result:
+            log.error("parameters not found: %s", ", ".join(missing))
+        return result
+
+    def storage_values(self, access_key):
+        """
+        returns the values and descriptions of the parameters storing the `access_key` in
+        the StorageFormat, by name.
+        """
+        smtp_password = self.hash_secret(access_key["SecretAccessKey"])
+        if self.storage_format == "json":
+            value = {
+                "AccessKeyId": access_key["AccessKeyId"],
+                "SecretAccessKey": access_key["SecretAccessKey"],
+                "SMTPPassword": smtp_password,
+                "SMTPPasswords": self.smtp_passwords(access_key["SecretAccessKey"]),
+            }
+            return {self.parameter_path: (json.dumps(value), "access key")}
+
+        values = {
+            "AccessKeyId": (access_key["AccessKeyId"], "access id"),
+            "SecretAccessKey": (access_key["SecretAccessKey"], "secret key"),
+            "SMTPPassword": (smtp_password, "smtp password"),
+        }
+        return {
+            "{}/{}".format(self.parameter_path, n): values[a]
+            for a, n in parameter_names.items()
+        }
 
-        return False
+    def put_in_parameter_store(self, access_key, previous=None) -> bool:
+        """
+        writes the `access_key` under the ParameterPath in the StorageFormat, in concurrent
+        calls. The parameters are overwritten if their `previous` values under the path are
+        given by name, and are new otherwise: existing parameters are a conflict. Returns False
+        and fails the request if a parameter could not be written, after restoring the
+        parameters written by this call to their previous values.
+        """
+        overwrite = previous is not None
+        futures = {}
+        for name, (value, description) in self.storage_values(access_key).items():
+            futures[name] = aws_clients.executor().submit(
+                write_scheduler.put_parameter,
+                self.ssm,
+                self.context,
+                Name=name,
+                Value=value,
+                Type="SecureString",
+                Overwrite=overwrite,
+                KeyId=self.get("KeyAlias"),
+                Description="{} {}".format(self.get("Description"), description),
+            )
 
-    def put_in_parameter_store(self, access_key):
-        self.ssm.put_parameter(
-            Name="{}/aws_access_key_id".format(self.parameter_path),
-            Value=access_key["AccessKeyId"],
-            Type="SecureString",
-            Overwrite=True,
-            KeyId=self.get("KeyAlias"),
-            Description="{} access id".format(self.get("Description")),
-        )
+        written, errors = [], []
+        for name, future in futures.items():
+            try:
+                future.result()
+                written.append(name)
+            except ClientError as e:
+                errors.append((name, e))
+        if not errors:
+            return True
 
-        self.ssm.put_parameter(
-            Name="{}/aws_secret_access_key".format(self.parameter_path),
-            Value=access_key["SecretAccessKey"],
-            Type="SecureString",
-            Overwrite=True,
-            KeyId=self.get("KeyAlias"),
-            Description="{} secret key".format(self.get("Description")),
-        )
+        conflicts = [
+            n
+            for n, e in errors
+            if e.response["Error"]["Code"] == "ParameterAlreadyExists"
+        ]
+        if conflicts:
+            self.fail("parameter {} already exists.".format(conflicts[0]))
+        else:
+            self.fail(
+                "; ".join(
+                    "failed to put parameter {}, {}".format(n, e) for n, e in errors
+                )
+            )
+        if written:
+            # the caller still rolls back the access key
+            self.restore_parameters(written, previous or {})
+        return False
 
-        self.ssm.put_parameter(
-            Name="{}/smtp_password".format(self.parameter_path),
-            Value=self.hash_secret(access_key["SecretAccessKey"]),
-            Type="SecureString",
-            Overwrite=True,
-            KeyId=self.get("KeyAlias"),
-            Description="{} smtp password".format(self.get("Description")),
-        )
+    def restore_parameters(self, names, previous):
+        """
+        restores the parameters `names` to their `previous` values by name, and removes the
+        parameters without a previous value.
+        """
+        for name in [n for n in names if n in previous]:
+            try:
+                write_scheduler.put_parameter(
+                    self.ssm,
+                    self.context,
+                    Name=name,
+                    Value=previous[name],
+                    Type="SecureString",
+                    Overwrite=True,
+                    KeyId=self.get_old("KeyAlias", self.get("KeyAlias")),
+                )
+            except ClientError as e:
+                self.reason = "{}; failed to restore parameter {}, {}".format(
+                    self.reason, name, e
+                )
 
-    def remove_from_parameter_store(self, parameter_path):
-        name = None
-        for suffix in [
-            "/aws_access_key_id",
-            "/aws_secret_access_key",
-            "/smtp_password",
-        ]:
+        removed = [n for n in names if n not in previous]
+        if removed:
             try:
-                name = "{}{}".format(parameter_path, suffix)
-                self.ssm.delete_parameter(Name=name)
+                self.ssm.delete_parameters(Names=removed)
             except ClientError as e:
-                if e.response["Error"]["Code"] != "ParameterNotFound":
-                    msg = "failed to delete parameter {}, {}\n".format(name, e)
-                    self.reason = "{}{}".format(self.reason, msg)
+                self.reason = "{}; failed to delete parameters {}, {}".format(
+                    self.reason, ", ".join(removed), e
+                )
 
-    def get_from_parameter_store(self, parameter_path=None) -> dict:
+    def remove_from_parameter_store(
+        self, parameter_path, storage_formats=("json", "parameters")
+    ):
+        names = []
+        for storage_format in storage_formats:
+            names.extend(self.storage_names(parameter_path, storage_format))
+        try:
+            self.ssm.delete_parameters(Names=names)
+        except ClientError as e:
+            msg = "failed to delete parameters {}, {}\n".format(", ".join(names), e)
+            self.reason = "{}{}".format(self.reason, msg)
+
+    def get_from_parameter_store(
+        self, parameter_path=None, storage_format=None, parameters=None
+    ) -> dict:
+        """
+        returns the access key under `parameter_path`, preferably from the parameters of
+        `storage_format`, or None if it is not found in either storage format. The decrypted
+        `parameters` under the path by name are read if they are not given.
+        """
         if parameter_path is None:
             parameter_path = self.parameter_path
+        if storage_format is None:
+            storage_format = self.storage_format
 
-        try:
-            result = {}
-            response = self.ssm.get_parameter(
-                Name="{}/aws_access_key_id".format(parameter_path), WithDecryption=True
-            )
-            result["AccessKeyId"] = response["Parameter"]["Value"]
-            response = self.ssm.get_parameter(
-                Name="{}/aws_secret_access_key".format(parameter_path),
-                WithDecryption=True,
-            )
-            result["SecretAccessKey"] = response["Parameter"]["Value"]
-            response = self.ssm.get_parameter(
-                Name="{}/smtp_password".format(parameter_path), WithDecryption=True
-            )
-            result["SMTPPassword"] = response["Parameter"]["Value"]
-            return result
-        except self.ssm.exceptions.ParameterNotFound as e:
-            log.error("%s", e)
-            return None
+        access_keys = self.find_access_keys(parameter_path, parameters)
+        if storage_format in access_keys:
+            return access_keys[storage_format]
+        return next(iter(access_keys.values()), None)
 
-    def set_result_attributes(self, access_key):
+    def set_result_attributes(self, access_key, previous=None) -> bool:
+        if not self.put_in_parameter_store(access_key, previous):
+            return False
         self.physical_resource_id = access_key["AccessKeyId"]
-        self.put_in_parameter_store(access_key)
 
         if self.get("ReturnSecret"):
             self.set_attribute("SecretAccessKey", access_key["SecretAccessKey"])
@@ -237,6 +420,12 @@ class AccessKeyProvider(ResourceProvider):
             self.set_attribute(
                 "SMTPPassword", self.hash_secret(access_key["SecretAccessKey"])
             )
+            if self.get("SMTPRegions"):
+                smtp_passwords = self.smtp_passwords(access_key["SecretAccessKey"])
+                for region in self.get("SMTPRegions"):
+                    self.set_attribute(
+                        "SMTPPassword.{}".format(region), smtp_passwords[region]
+                    )
 
         self.set_attribute(
             "Hash",
@@ -248,15 +437,15 @@ class AccessKeyProvider(ResourceProvider):
         self.set_attribute("ParameterPath", self.parameter_path)
 
         self.no_echo = self.get("NoEcho")
+        return True
 
     def create(self):
-        if not self.check_parameter_path_exists():
-            access_key = self.create_access_key()
-            if access_key is not None:
-                self.set_result_attributes(access_key)
-            else:
-                self.physical_resource_id = "could-not-create"
-        else:
+        access_key = self.create_access_key()
+        if access_key is None:
+            self.physical_resource_id = "could-not-create"
+        elif not self.set_result_attributes(access_key):
+            # the parameters exist or could not be written: roll back the key
+            self.delete_access_key(access_key)
             self.physical_resource_id = "could-not-create"
 
     @property
@@ -279,10 +468,18 @@ class AccessKeyProvider(ResourceProvider):
             if self.check_parameter_path_exists():
                 return
 
+        # a new parameter path is checked to be free, so its parameters are new, and the
+        # parameters under the same path are overwritten, or restored if a write fails
+        previous = None
+        if self.parameter_path == self.old_parameter_path:
+            previous = self.get_parameters(self.parameter_path, True)
+
         if self.update_requires_new_key:
             access_key = self.create_access_key()
-            if access_key is not None:
-                self.set_result_attributes(access_key)
+            if access_key is not None and not self.set_result_attributes(
+                access_key, previous
+            ):
+                self.delete_access_key(access_key)
         else:
             try:
                 self.iam.update_access_key(
@@ -293,18 +490,25 @@ class AccessKeyProvider(ResourceProvider):
             except ClientError as e:
                 self.fail("failed to update access key, {}".format(e))
 
-            old_access_key = self.get_from_parameter_store(self.old_parameter_path)
-            if old_access_key is not None:
-                self.set_result_attributes(old_access_key)
-            else:
+            old_access_key = self.get_from_parameter_store(
+                self.old_parameter_path, self.old_storage_format, previous
+            )
+            if old_access_key is None:
                 self.fail(
                     "access key was not found under {}.".format(self.old_parameter_path)
                 )
                 return
 
-            if self.parameter_path != self.old_parameter_path:
-                self.put_in_parameter_store(old_access_key)
-                self.remove_from_parameter_store(self.old_parameter_path)
+            if not self.set_result_attributes(old_access_key, previous):
+                return
+
+            if (
+                self.parameter_path != self.old_parameter_path
+                or self.storage_format != self.old_storage_format
+            ):
+                self.remove_from_parameter_store(
+                    self.old_parameter_path, [self.old_storage_format]
+                )
 
     def delete(self):
         if self.physical_resource_id == "could-not-create":
@@ -320,13 +524,16 @@ class AccessKeyProvider(ResourceProvider):
         }
         self.delete_access_key(access_key)
 
-        old_access_key = self.get_from_parameter_store()
-        if (
-            old_access_key is not None
-            and old_access_key["AccessKeyId"] == self.physical_resource_id
-        ):
-            self.remove_from_parameter_store(self.parameter_path)
-        elif old_access_key is not None:
+        # remove the parameters of either storage format which still hold this key
+        access_keys = self.find_access_keys(self.parameter_path)
+        storage_formats = [
+            f
+            for f, k in access_keys.items()
+            if k["AccessKeyId"] == self.physical_resource_id
+        ]
+        if storage_formats:
+            self.remove_from_parameter_store(self.parameter_path, storage_formats)
+        elif access_keys:
             msg = "keeping parameters as the access key has changed."
             self.response["Reason"] = "{}{}".format(self.reason, msg)
         else:
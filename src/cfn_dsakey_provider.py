@@ -1,48 +1,52 @@
+import copy
+from functools import lru_cache
+
+import cfn_rsakey_provider
 from cfn_rsakey_provider import RSAKeyProvider
+from key_material import KeyMaterial
 from cryptography.hazmat.primitives.asymmetric import dsa
 from cryptography.hazmat.backends import default_backend as crypto_default_backend
 from cryptography.hazmat.primitives import serialization as crypto_serialization
 
+request_schema = copy.deepcopy(cfn_rsakey_provider.request_schema)
+request_schema["properties"]["ReuseDomainParameters"] = {
+    "type": "boolean",
+    "default": False,
+    "description": "generate the key from domain parameters shared by keys of the same size",
+}
+
+
+@lru_cache(maxsize=None)
+def domain_parameters(key_size):
+    """
+    returns the DSA domain parameters (p, q, g) for `key_size`, generated once per container.
+    """
+    return dsa.generate_parameters(key_size=key_size, backend=crypto_default_backend())
+
 
 class DSAKeyProvider(RSAKeyProvider):
     def __init__(self):
         super(DSAKeyProvider, self).__init__()
+        self.request_schema = request_schema
+
+    @property
+    def key_format(self):
+        return crypto_serialization.PrivateFormat.PKCS8
 
     def public_key(self, key):
-        if key.key_size > 1024:
-            return key.public_key().public_bytes(
-                crypto_serialization.Encoding.PEM,
-                crypto_serialization.PublicFormat.SubjectPublicKeyInfo,
-            )
+        if key.key.key_size > 1024:
+            return key.public_key_pem
         else:
-            return key.public_key().public_bytes(
-                crypto_serialization.Encoding.OpenSSH,
-                crypto_serialization.PublicFormat.OpenSSH,
-            )
-
-    def get_key(self):
-        response = self.ssm.get_parameter(
-            Name=self.name_from_physical_resource_id(), WithDecryption=True
-        )
-        private_key = response["Parameter"]["Value"]
-
-        key = crypto_serialization.load_pem_private_key(
-            private_key.encode("ascii"), password=None, backend=crypto_default_backend()
-        )
-
-        return private_key, self.public_key(key).decode("ascii")
+            return key.openssh_public_key
 
     def create_key(self):
-        key = dsa.generate_private_key(
-            backend=crypto_default_backend(), key_size=self.get("KeySize")
-        )
-        private_key = key.private_bytes(
-            crypto_serialization.Encoding.PEM,
-            crypto_serialization.PrivateFormat.PKCS8,
-            crypto_serialization.NoEncryption(),
-        )
-
-        return private_key.decode("ascii"), self.public_key(key).decode("ascii")
+        if self.get("ReuseDomainParameters"):
+            key = domain_parameters(self.get("KeySize")).generate_private_key()
+        else:
+            key = dsa.generate_private_key(
+                backend=crypto_default_backend(), key_size=self.get("KeySize")
+            )
+        return KeyMaterial(key)
 
 
 provider = DSAKeyProvider()
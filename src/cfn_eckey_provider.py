@@ -0,0 +1,51 @@
+import copy
+
+import cfn_rsakey_provider
+from cfn_rsakey_provider import RSAKeyProvider
+from key_material import KeyMaterial
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.backends import default_backend as crypto_default_backend
+
+curves = {"P-256": ec.SECP256R1, "P-384": ec.SECP384R1, "P-521": ec.SECP521R1}
+
+request_schema = copy.deepcopy(cfn_rsakey_provider.request_schema)
+del request_schema["properties"]["KeySize"]
+request_schema["properties"]["KeyType"] = {
+    "type": "string",
+    "enum": ["Ed25519"] + list(curves.keys()),
+    "default": "Ed25519",
+    "description": "type of elliptic curve key",
+}
+
+
+class ECKeyProvider(RSAKeyProvider):
+    def __init__(self):
+        super(ECKeyProvider, self).__init__()
+        self.request_schema = request_schema
+
+    def is_valid_request(self):
+        result = super(ECKeyProvider, self).is_valid_request()
+        if (
+            result
+            and self.get("KeyType") == "Ed25519"
+            and self.get("KeyFormat") == "TraditionalOpenSSL"
+        ):
+            self.fail("Ed25519 keys can only be stored in PKCS8 format")
+            result = False
+        return result
+
+    def create_key(self):
+        if self.get("KeyType") == "Ed25519":
+            key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            key = ec.generate_private_key(
+                curves[self.get("KeyType")](), backend=crypto_default_backend()
+            )
+        return KeyMaterial(key)
+
+
+provider = ECKeyProvider()
+
+
+def handler(request, context):
+    return provider.handle(request, context)
@@ -1,10 +1,12 @@
-import boto3
 import logging
 import os
 import re
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
+
 log = logging.getLogger()
 log.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
@@ -33,9 +35,18 @@ class KeyPairProvider(ResourceProvider):
         super(KeyPairProvider, self).__init__()
         self._value = None
         self.request_schema = request_schema
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
-        self.ec2 = boto3.client("ec2")
+
+    @property
+    def ec2(self):
+        return aws_clients.client("ec2")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     @property
     def allow_overwrite(self):
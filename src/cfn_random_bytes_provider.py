@@ -4,11 +4,15 @@ import hashlib
 import logging
 import os
 
-import boto3
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
+import entropy
+import property_changes
 import ssm_parameter_name
+import write_scheduler
 
 log = logging.getLogger()
 log.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
@@ -66,10 +70,18 @@ class RandomBytesProvider(ResourceProvider):
         super(RandomBytesProvider, self).__init__()
         self._value = None
         self.request_schema = request_schema
-        self.ssm = boto3.client("ssm")
-        self.kms = boto3.client("kms")
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
+
+    @property
+    def ssm(self):
+        return aws_clients.client("ssm")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     def convert_property_types(self):
         try:
@@ -108,7 +120,14 @@ class RandomBytesProvider(ResourceProvider):
         return ssm_parameter_name.to_arn(self.region, self.account_id, self.get("Name"))
 
     def get_content(self):
-        return base64.b64encode(os.urandom(self.get("Length"))).decode("ascii")
+        return base64.b64encode(entropy.token_bytes(self.get("Length"))).decode("ascii")
+
+    @property
+    def is_unchanged_parameter(self):
+        """
+        true if the update does not change the description or the KMS key of the parameter.
+        """
+        return property_changes.unchanged(self, ["Description", "KeyAlias"])
 
     def put_parameter(self, overwrite=False, new_secret=True):
         try:
@@ -122,13 +141,22 @@ class RandomBytesProvider(ResourceProvider):
             if self.get("Description") != "":
                 kwargs["Description"] = self.get("Description")
 
+            current = None
             if new_secret:
                 kwargs["Value"] = self.get_content()
             else:
-                kwargs["Value"] = self.get_secret()
+                current = self.get_parameter()
+                kwargs["Value"] = current["Value"]
 
-            response = self.ssm.put_parameter(**kwargs)
-            version = response["Version"] if "Version" in response else 1
+            if overwrite and current is not None and self.is_unchanged_parameter:
+                # the value is kept, so the write would only increment the version
+                log.info("parameter %s is unchanged", self.get("Name"))
+                version = current["Version"]
+            else:
+                response = write_scheduler.put_parameter(
+                    self.ssm, self.context, **kwargs
+                )
+                version = response["Version"] if "Version" in response else 1
 
             self.set_attribute("Arn", self.arn)
             self.set_attribute(
@@ -151,11 +179,11 @@ class RandomBytesProvider(ResourceProvider):
                 self.physical_resource_id = "could-not-create"
             self.fail(str(e))
 
-    def get_secret(self):
+    def get_parameter(self):
         response = self.ssm.get_parameter(
             Name=self.name_from_physical_resource_id(), WithDecryption=True
         )
-        return response["Parameter"]["Value"]
+        return response["Parameter"]
 
     def create(self):
         self.put_parameter(overwrite=False, new_secret=True)
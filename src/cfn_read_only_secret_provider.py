@@ -2,9 +2,10 @@ import hashlib
 import logging
 import os
 
-import boto3
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
 import ssm_parameter_name
 
 log = logging.getLogger()
@@ -40,8 +41,14 @@ class ReadOnlySecretProvider(ResourceProvider):
         super(ReadOnlySecretProvider, self).__init__()
         self._value = None
         self.request_schema = request_schema
-        self.default_region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
+
+    @property
+    def default_region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     @property
     def region(self):
@@ -49,7 +56,7 @@ class ReadOnlySecretProvider(ResourceProvider):
 
     @property
     def ssm(self):
-        return boto3.client("ssm", region_name=self.region)
+        return aws_clients.client("ssm", region_name=self.region)
 
     @property
     def arn(self):
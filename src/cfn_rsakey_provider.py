@@ -1,12 +1,20 @@
-import boto3
 import hashlib
+import json
 import logging
+import os
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 from cryptography.hazmat.backends import default_backend as crypto_default_backend
 from cryptography.hazmat.primitives import serialization as crypto_serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
+import aws_clients
+import caller_identity
+import property_changes
 import ssm_parameter_name
+import write_scheduler
+from key_material import KeyMaterial
+from key_pool import KeyPool
+from key_store import ParameterStoreKeyStore
 
 log = logging.getLogger()
 
@@ -47,21 +55,72 @@ request_schema = {
             "description": "generate a new secret on update",
         },
         "Version": {"type": "string", "description": "opaque string to force update"},
+        "StorePublicKey": {
+            "type": "boolean",
+            "default": False,
+            "description": "store the public key attributes in the parameter '<Name>.pub'",
+        },
     },
 }
 
 
+def generate_private_key(key_size, public_exponent):
+    return rsa.generate_private_key(
+        backend=crypto_default_backend(),
+        public_exponent=public_exponent,
+        key_size=key_size,
+    )
+
+
+def claim_private_key(key_size, public_exponent):
+    if key_store is None:
+        return None
+    private_key = key_store.claim((key_size, public_exponent))
+    if private_key is None:
+        return None
+    return crypto_serialization.load_pem_private_key(
+        private_key.encode("ascii"), password=None, backend=crypto_default_backend()
+    )
+
+
+# durable store of pre-generated keys, filled by `replenish`
+key_store = (
+    ParameterStoreKeyStore(
+        os.environ["RSA_KEY_POOL_PATH"],
+        os.environ.get("RSA_KEY_POOL_KEY_ALIAS", "alias/aws/ssm"),
+    )
+    if os.environ.get("RSA_KEY_POOL_PATH")
+    else None
+)
+
+key_pool = KeyPool(
+    "rsa key",
+    generate_private_key,
+    int(os.environ.get("RSA_KEY_POOL_SIZE", "0")),
+    claim=claim_private_key,
+)
+
+
 class RSAKeyProvider(ResourceProvider):
     def __init__(self):
         super(RSAKeyProvider, self).__init__()
         self.request_schema = request_schema
-        self.ssm = boto3.client("ssm")
-        self.iam = boto3.client("iam")
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
+
+    @property
+    def ssm(self):
+        return aws_clients.client("ssm")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     def convert_property_types(self):
         self.heuristic_convert_property_types(self.properties)
+        self.heuristic_convert_property_types(self.old_properties)
 
     @property
     def allow_overwrite(self):
@@ -81,103 +140,146 @@ class RSAKeyProvider(ResourceProvider):
         else:
             return crypto_serialization.PrivateFormat.PKCS8
 
+    def public_key(self, key):
+        return key.openssh_public_key
+
     def get_key(self):
         response = self.ssm.get_parameter(
             Name=self.name_from_physical_resource_id(), WithDecryption=True
         )
-        private_key = response["Parameter"]["Value"].encode("ascii")
+        return KeyMaterial.from_pem(response["Parameter"]["Value"])
 
-        key = crypto_serialization.load_pem_private_key(
-            private_key, password=None, backend=crypto_default_backend()
-        )
+    def create_key(self):
+        return KeyMaterial(key_pool.get(self.get("KeySize"), 65537))
 
-        private_key = key.private_bytes(
-            crypto_serialization.Encoding.PEM,
-            self.key_format,
-            crypto_serialization.NoEncryption(),
+    @property
+    def public_key_parameter_name(self):
+        return "{}.pub".format(self.get("Name"))
+
+    def put_public_key_parameter(self, attributes, overwrite=False):
+        write_scheduler.put_parameter(
+            self.ssm,
+            self.context,
+            Name=self.public_key_parameter_name,
+            Type="String",
+            Overwrite=overwrite,
+            Value=json.dumps(attributes),
+            Description="public key of {}".format(self.get("Name")),
         )
 
-        public_key = key.public_key().public_bytes(
-            crypto_serialization.Encoding.OpenSSH,
-            crypto_serialization.PublicFormat.OpenSSH,
-        )
-        return private_key.decode("ascii"), public_key.decode("ascii")
+    def delete_public_key_parameter(self, name):
+        try:
+            self.ssm.delete_parameter(Name="{}.pub".format(name))
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ParameterNotFound":
+                raise
 
-    def create_key(self):
-        key = rsa.generate_private_key(
-            backend=crypto_default_backend(),
-            public_exponent=65537,
-            key_size=self.get("KeySize"),
-        )
-        private_key = key.private_bytes(
-            crypto_serialization.Encoding.PEM,
-            self.key_format,
-            crypto_serialization.NoEncryption(),
-        )
+    def get_public_key_parameter(self):
+        """
+        returns the public key attributes from the parameter '<Name>.pub', or None if not found.
+        """
+        try:
+            response = self.ssm.get_parameter(Name=self.public_key_parameter_name)
+            return json.loads(response["Parameter"]["Value"])
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ParameterNotFound":
+                raise
+            return None
 
-        public_key = key.public_key().public_bytes(
-            crypto_serialization.Encoding.OpenSSH,
-            crypto_serialization.PublicFormat.OpenSSH,
-        )
-        return private_key.decode("ascii"), public_key.decode("ascii")
+    def set_key_attributes(self, attributes):
+        self.set_attribute("Arn", self.arn)
+        for name in ["PublicKey", "PublicKeyPEM", "Hash", "Version"]:
+            self.set_attribute(name, attributes[name])
 
-    def public_key_to_pem(self, private_key):
-        key = crypto_serialization.load_pem_private_key(
-            private_key.encode("ascii"), password=None, backend=crypto_default_backend()
-        )
+        if not ssm_parameter_name.equals(self.physical_resource_id, self.arn):
+            # prevent CFN deleting a resource with identical Arns in different formats.
+            self.physical_resource_id = self.arn
 
-        public_key = key.public_key().public_bytes(
-            crypto_serialization.Encoding.PEM,
-            crypto_serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
+        self.set_attribute("ParameterName", self.name_from_physical_resource_id())
 
-        return public_key.decode("ascii")
+    @property
+    def is_unchanged_key(self):
+        """
+        true if the update does not affect the stored key, and the public key attributes were stored with it.
+        """
+        if self.get("RefreshOnUpdate") or not self.allow_overwrite:
+            return False
+        if not (self.get("StorePublicKey") and self.get_old("StorePublicKey")):
+            return False
+        return property_changes.unchanged(
+            self, ["Name", "KeyAlias", "KeyFormat", "Description"]
+        )
 
     def create_or_update_secret(self, overwrite=False, new_secret=True):
+        written = False
         try:
-            if new_secret:
-                private_key, public_key = self.create_key()
-            else:
-                private_key, public_key = self.get_key()
+            key = self.create_key() if new_secret else self.get_key()
+            public_key = self.public_key(key)
 
             kwargs = {
                 "Name": self.get("Name"),
                 "KeyId": self.get("KeyAlias"),
                 "Type": "SecureString",
                 "Overwrite": overwrite,
-                "Value": private_key,
+                "Value": key.private_key(self.key_format),
             }
             if self.get("Description") != "":
                 kwargs["Description"] = self.get("Description")
 
-            response = self.ssm.put_parameter(**kwargs)
+            response = write_scheduler.put_parameter(self.ssm, self.context, **kwargs)
             version = response["Version"] if "Version" in response else 1
+            written = True
 
-            self.set_attribute("Arn", self.arn)
-            self.set_attribute("PublicKey", public_key)
-            self.set_attribute("PublicKeyPEM", self.public_key_to_pem(private_key))
-            self.set_attribute(
-                "Hash", hashlib.md5(public_key.encode("utf-8")).hexdigest()
-            )
-            self.set_attribute("Version", version)
-
-            if not ssm_parameter_name.equals(self.physical_resource_id, self.arn):
-                # prevent CFN deleting a resource with identical Arns in different formats.
-                self.physical_resource_id = self.arn
-
-            self.set_attribute("ParameterName", self.name_from_physical_resource_id())
+            attributes = {
+                "PublicKey": public_key,
+                "PublicKeyPEM": key.public_key_pem,
+                "Hash": hashlib.md5(public_key.encode("utf-8")).hexdigest(),
+                "Version": version,
+            }
+            if self.get("StorePublicKey"):
+                self.put_public_key_parameter(attributes, overwrite)
+            self.set_key_attributes(attributes)
 
         except ClientError as e:
             self.physical_resource_id = "could-not-create"
             self.fail(str(e))
+            if written and not overwrite:
+                # the rollback does not delete a key which could not be created
+                try:
+                    self.ssm.delete_parameter(Name=self.get("Name"))
+                except ClientError as e:
+                    self.reason = "{}; failed to delete parameter {}, {}".format(
+                        self.reason, self.get("Name"), e
+                    )
 
     def create(self):
         self.create_or_update_secret(overwrite=False, new_secret=True)
 
     def update(self):
+        if self.is_unchanged_key:
+            try:
+                attributes = self.get_public_key_parameter()
+            except ClientError as e:
+                return self.fail(str(e))
+            if attributes is not None:
+                log.info("key is unchanged, returning the stored public key")
+                self.set_key_attributes(attributes)
+                return
+
         self.create_or_update_secret(
             overwrite=self.allow_overwrite, new_secret=self.get("RefreshOnUpdate")
         )
+        if (
+            self.status == "SUCCESS"
+            and self.allow_overwrite
+            and self.get_old("StorePublicKey")
+            and not self.get("StorePublicKey")
+        ):
+            # the public key is no longer stored, and a delete would leave it behind
+            try:
+                self.delete_public_key_parameter(self.get("Name"))
+            except ClientError as e:
+                self.fail(str(e))
 
     def delete(self):
         name = self.physical_resource_id.split("/", 1)
@@ -188,6 +290,14 @@ class RSAKeyProvider(ResourceProvider):
                 if e.response["Error"]["Code"] != "ParameterNotFound":
                     return self.fail(str(e))
 
+            if self.get("StorePublicKey"):
+                try:
+                    self.delete_public_key_parameter(
+                        self.name_from_physical_resource_id()
+                    )
+                except ClientError as e:
+                    return self.fail(str(e))
+
             self.success("System Parameter with the name %s is deleted" % name)
         else:
             self.success(
@@ -201,3 +311,38 @@ provider = RSAKeyProvider()
 
 def handler(request, context):
     return provider.handle(request, context)
+
+
+def replenish(request, context):
+    """
+    fills the durable key store up to `Count` keys of `KeySize` bits. Invoke it on a schedule or
+    before a large deployment, with a request like {"KeySize": 4096, "Count": 20}.
+    """
+    if key_store is None:
+        raise ValueError(
+            "RSA_KEY_POOL_PATH is not set, no durable key store to replenish"
+        )
+
+    key_size = int(request.get("KeySize", 2048))
+    count = int(request.get("Count", 10))
+    spec = (key_size, 65537)
+
+    available = key_store.count(spec)
+    added = 0
+    while available + added < count:
+        if hasattr(context, "get_remaining_time_in_millis"):
+            # leave time for one more key and the report
+            if context.get_remaining_time_in_millis() < 10000:
+                log.warning("stopped replenishing key store, running out of time")
+                break
+        key = generate_private_key(*spec)
+        private_key = key.private_bytes(
+            crypto_serialization.Encoding.PEM,
+            crypto_serialization.PrivateFormat.PKCS8,
+            crypto_serialization.NoEncryption(),
+        )
+        key_store.put(spec, private_key.decode("ascii"))
+        added += 1
+
+    log.info("added %d keys of %d bits to the key store", added, key_size)
+    return {"KeySize": key_size, "Available": available + added, "Added": added}
@@ -4,14 +4,22 @@ import logging
 import os
 import string
 from base64 import b64decode
-from random import choice
 
 
-import boto3
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
+import decrypt_cache
+import entropy
+import envelope
+import password_policy
+import property_changes
+import secret_template
 import ssm_parameter_name
+import wordlist
+import write_scheduler
 
 log = logging.getLogger()
 log.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
@@ -49,6 +57,17 @@ request_schema = {
                 },
             },
         },
+        "PassphraseWords": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 64,
+            "description": "generate a passphrase of this number of words, instead of a password from the Alphabet",
+        },
+        "Separator": {
+            "type": "string",
+            "default": "-",
+            "description": "the separator of the words in a passphrase",
+        },
         "RefreshOnUpdate": {
             "type": "boolean",
             "default": False,
@@ -65,8 +84,8 @@ request_schema = {
             "description": "KMS key to use to encrypt the value",
         },
         "Content": {
-            "type": "string",
-            "description": "Plain text secret, to be stored as is.",
+            "type": ["string", "object"],
+            "description": "Plain text secret, to be stored as is, or the template of a JSON secret.",
         },
         "EncryptedContent": {
             "type": "string",
@@ -94,10 +113,22 @@ class SecretProvider(ResourceProvider):
         super(SecretProvider, self).__init__()
         self._value = None
         self.request_schema = request_schema
-        self.ssm = boto3.client("ssm")
-        self.kms = boto3.client("kms")
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
+
+    @property
+    def ssm(self):
+        return aws_clients.client("ssm")
+
+    @property
+    def kms(self):
+        return aws_clients.client("kms")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     def is_valid_request(self):
         result = super(SecretProvider, self).is_valid_request()
@@ -111,17 +142,28 @@ class SecretProvider(ResourceProvider):
 
         if "EncryptedContent" in self.properties:
             try:
-                b64decode(self.get("EncryptedContent"))
+                blob = b64decode(self.get("EncryptedContent"))
+                if envelope.is_envelope(blob):
+                    envelope.parse(blob)
             except binascii.Error as e:
                 self.fail("EncryptedContent is not base64 encoded, {}".format(e))
                 result = False
+            except ValueError as e:
+                self.fail("EncryptedContent is an invalid envelope, {}".format(e))
+                result = False
 
-        if result and "Required" in self.properties:
-            required_characters = sum(map(lambda r: r["Count"], self.get("Required")))
-            if required_characters > self.get("Length"):
-                self.fail(
-                    f"the length should at least exceed the {required_characters} required characters"
-                )
+        if result:
+            try:
+                self.password_policy
+                if isinstance(self.get("Content"), dict):
+                    self.content_template
+                if "PassphraseWords" in self.properties:
+                    wordlist.load()
+            except ValueError as e:
+                self.fail(str(e))
+                result = False
+            except OSError as e:
+                self.fail("failed to load the word list for passphrases, {}".format(e))
                 result = False
 
         return result
@@ -132,6 +174,12 @@ class SecretProvider(ResourceProvider):
                 self.properties["Length"], str
             ):
                 self.properties["Length"] = int(self.properties["Length"])
+            if "PassphraseWords" in self.properties and isinstance(
+                self.properties["PassphraseWords"], str
+            ):
+                self.properties["PassphraseWords"] = int(
+                    self.properties["PassphraseWords"]
+                )
             if "ReturnSecret" in self.properties and isinstance(
                 self.properties["ReturnSecret"], str
             ):
@@ -164,35 +212,69 @@ class SecretProvider(ResourceProvider):
     def arn(self):
         return ssm_parameter_name.to_arn(self.region, self.account_id, self.get("Name"))
 
-    def generate_password(self):
-        if not self.get("Required"):
-            return "".join(
-                choice(self.get("Alphabet")) for _ in range(0, self.get("Length"))
-            )
+    @property
+    def password_policy(self):
+        return password_policy.compile(
+            self.get("Alphabet"), self.get("Length"), self.get("Required")
+        )
 
-        result = []
-        for r in self.get("Required", []):
-            for c in range(r["Count"]):
-                result.append(choice(r["Alphabet"]))
+    def generate_password(self):
+        return self.password_policy.generate()
 
-        to_append = self.get("Length") - len(result)
-        result.extend(choice(self.get("Alphabet")) for _ in range(0, to_append))
+    def generate_passphrase(self):
+        words = wordlist.load()
+        return self.get("Separator").join(
+            words[entropy.randbelow(len(words))]
+            for _ in range(self.get("PassphraseWords"))
+        )
 
-        return "".join(result)
+    @property
+    def content_template(self):
+        return secret_template.SecretTemplate(
+            self.get("Content"),
+            self.get("Alphabet"),
+            self.get("Length"),
+            self.get("Required"),
+        )
 
     def get_content(self):
         if "EncryptedContent" in self.properties:
-            result = self.kms.decrypt(
-                CiphertextBlob=b64decode(self.get("EncryptedContent"))
-            )
-            result = result["Plaintext"].decode("utf8")
+            blob = b64decode(self.get("EncryptedContent"))
+            if envelope.is_envelope(blob):
+                # the data key is cached, so envelopes sharing it are decrypted locally
+                result = envelope.unseal(
+                    blob, lambda key: decrypt_cache.decrypt(self.kms, key)
+                )
+            else:
+                result = decrypt_cache.decrypt(self.kms, blob)
+            result = result.decode("utf8")
+        elif isinstance(self.get("Content"), dict):
+            result = self.content_template.render()
         elif "Content" in self.properties:
             result = self.get("Content")
+        elif "PassphraseWords" in self.properties:
+            result = self.generate_passphrase()
         else:
             result = self.generate_password()
 
         return result
 
+    @property
+    def is_unchanged_parameter(self):
+        """
+        true if the update does not change the description or the KMS key of the parameter.
+        """
+        return property_changes.unchanged(self, ["Description", "KeyAlias"])
+
+    @property
+    def is_given_content(self):
+        """
+        true if the secret is the given content, instead of a generated one.
+        """
+        return "EncryptedContent" in self.properties or isinstance(
+            self.get("Content"), str
+        )
+
     def put_parameter(self, overwrite=False, new_secret=True):
         try:
             kwargs = {
@@ -205,18 +287,37 @@ class SecretProvider(ResourceProvider):
             if self.get("Description") != "":
                 kwargs["Description"] = self.get("Description")
 
+            current = None
             if new_secret:
                 kwargs["Value"] = self.get_content()
+                if overwrite and self.is_given_content and self.is_unchanged_parameter:
+                    current = self.get_parameter(missing_ok=True)
             else:
-                kwargs["Value"] = self.get_secret()
-
-            response = self.ssm.put_parameter(**kwargs)
-            version = response["Version"] if "Version" in response else 1
+                current = self.get_parameter()
+                kwargs["Value"] = current["Value"]
+            value_hash = hashlib.md5(kwargs["Value"].encode("utf8")).hexdigest()
+            if len(kwargs["Value"].encode("utf8")) > 4096:
+                # a standard parameter holds at most 4 KB, an advanced one 8 KB
+                kwargs["Tier"] = "Intelligent-Tiering"
+
+            if (
+                overwrite
+                and current is not None
+                and self.is_unchanged_parameter
+                and hashlib.md5(current["Value"].encode("utf8")).hexdigest()
+                == value_hash
+            ):
+                # nothing changed, so the write would only increment the version
+                log.info("parameter %s is unchanged", self.get("Name"))
+                version = current["Version"]
+            else:
+                response = write_scheduler.put_parameter(
+                    self.ssm, self.context, **kwargs
+                )
+                version = response["Version"] if "Version" in response else 1
 
             self.set_attribute("Arn", self.arn)
-            self.set_attribute(
-                "Hash", hashlib.md5(kwargs["Value"].encode("utf8")).hexdigest()
-            )
+            self.set_attribute("Hash", value_hash)
             self.set_attribute("Version", version)
             if self.get("ReturnSecret"):
                 self.set_attribute("Secret", kwargs["Value"])
@@ -227,23 +328,35 @@ class SecretProvider(ResourceProvider):
                 self.physical_resource_id = self.arn
 
             self.set_attribute("ParameterName", self.name_from_physical_resource_id())
-        except (TypeError, ClientError) as e:
+        except (TypeError, ValueError, ClientError) as e:
             if self.request_type == "Create":
                 self.physical_resource_id = "could-not-create"
             self.fail(str(e))
 
-    def get_secret(self):
-        response = self.ssm.get_parameter(
-            Name=self.name_from_physical_resource_id(), WithDecryption=True
-        )
-        return response["Parameter"]["Value"]
+    def get_parameter(self, missing_ok=False):
+        """
+        returns the current parameter of the secret, or None if it is not found and `missing_ok`.
+        """
+        try:
+            response = self.ssm.get_parameter(
+                Name=self.name_from_physical_resource_id(), WithDecryption=True
+            )
+            return response["Parameter"]
+        except ClientError as e:
+            if not missing_ok or e.response["Error"]["Code"] != "ParameterNotFound":
+                raise
+            return None
 
     def create(self):
         self.put_parameter(overwrite=False, new_secret=True)
 
     @property
     def refresh_on_update(self) -> bool:
-        return self.get("RefreshOnUpdate") or self.get("EncryptedContent")
+        # an unchanged ciphertext is the stored value, and is not decrypted again
+        return self.get("RefreshOnUpdate") or (
+            "EncryptedContent" in self.properties
+            and self.get("EncryptedContent") != self.get_old("EncryptedContent")
+        )
 
     def update(self):
         self.put_parameter(
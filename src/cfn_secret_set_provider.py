@@ -0,0 +1,303 @@
+import copy
+import hashlib
+import logging
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+import cfn_secret_provider
+import password_policy
+import property_changes
+import rate_limiter
+import ssm_parameter_name
+import write_scheduler
+from cfn_secret_provider import SecretProvider
+
+log = logging.getLogger()
+
+secret_schema = {
+    "type": "object",
+    "required": ["Id", "Name"],
+    "properties": {
+        "Id": {
+            "type": "string",
+            "pattern": "^[a-zA-Z0-9]+$",
+            "description": "the identifier of the secret in the attribute names",
+        },
+        "Name": copy.deepcopy(cfn_secret_provider.request_schema["properties"]["Name"]),
+        "Description": {
+            "type": "string",
+            "default": "",
+            "description": "the description of the value in the parameter store",
+        },
+        "Alphabet": {
+            "type": "string",
+            "description": "the characters from which to generate the secret, defaults to the Alphabet of the set",
+        },
+        "Required": copy.deepcopy(
+            cfn_secret_provider.request_schema["properties"]["Required"]
+        ),
+        "Length": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 512,
+            "description": "length of the secret, defaults to the Length of the set",
+        },
+    },
+}
+
+request_schema = copy.deepcopy(cfn_secret_provider.request_schema)
+request_schema["required"] = ["Secrets"]
+for name in [
+    "Name",
+    "Description",
+    "Content",
+    "EncryptedContent",
+    "PassphraseWords",
+    "Separator",
+]:
+    del request_schema["properties"][name]
+request_schema["properties"]["Secrets"] = {
+    "type": "array",
+    "minItems": 1,
+    "maxItems": 100,
+    "items": secret_schema,
+    "description": "the secrets in the set",
+}
+request_schema["properties"]["WritesPerSecond"] = {
+    "type": "number",
+    "minimum": 0.1,
+    "default": 10,
+    "description": "maximum rate of parameter store writes",
+}
+
+
+class SecretSetProvider(SecretProvider):
+    def __init__(self):
+        super(SecretSetProvider, self).__init__()
+        self.request_schema = request_schema
+
+    def convert_property_types(self):
+        super(SecretSetProvider, self).convert_property_types()
+        try:
+            if "WritesPerSecond" in self.properties and isinstance(
+                self.properties["WritesPerSecond"], str
+            ):
+                self.properties["WritesPerSecond"] = float(
+                    self.properties["WritesPerSecond"]
+                )
+            for secret in self.properties.get("Secrets", []):
+                if "Length" in secret and isinstance(secret["Length"], str):
+                    secret["Length"] = int(secret["Length"])
+                for a in secret.get("Required", []):
+                    a["Count"] = int(a["Count"])
+        except (TypeError, ValueError) as e:
+            log.error("failed to convert property types %s", e)
+
+    def is_valid_request(self):
+        result = super(SecretSetProvider, self).is_valid_request()
+        if not result:
+            return result
+
+        for property_name in ["Id", "Name"]:
+            values = [s[property_name] for s in self.get("Secrets")]
+            duplicates = sorted(set(v for v in values if values.count(v) > 1))
+            if duplicates:
+                self.fail(
+                    "duplicate {} in Secrets: {}".format(
+                        property_name, ", ".join(duplicates)
+                    )
+                )
+                return False
+
+        for secret in self.get("Secrets"):
+            try:
+                self.secret_password_policy(secret)
+            except ValueError as e:
+                self.fail("secret {}: {}".format(secret["Id"], e))
+                return False
+        return result
+
+    def secret_password_policy(self, secret):
+        return password_policy.compile(
+            secret.get("Alphabet", self.get("Alphabet")),
+            secret.get("Length", self.get("Length")),
+            secret.get("Required", self.get("Required")),
+        )
+
+    def secret_arn(self, secret):
+        return ssm_parameter_name.to_arn(self.region, self.account_id, secret["Name"])
+
+    @property
+    def set_id(self):
+        """
+        the physical resource id of the set, derived from the names of the secrets on create.
+        """
+        arns = sorted(self.secret_arn(s) for s in self.get("Secrets"))
+        return "secret-set-{}".format(
+            hashlib.sha256("\n".join(arns).encode("utf8")).hexdigest()[:32]
+        )
+
+    def get_secrets(self, names):
+        """
+        returns the current values and versions of the parameters `names`, read in batches of 10.
+        """
+        values = {}
+        for i in range(0, len(names), 10):
+            response = self.ssm.get_parameters(
+                Names=names[i : i + 10], WithDecryption=True
+            )
+            if response["InvalidParameters"]:
+                raise ValueError(
+                    "secrets not found: {}".format(
+                        ", ".join(response["InvalidParameters"])
+                    )
+                )
+            for p in response["Parameters"]:
+                values[ssm_parameter_name.normalize(p["Name"])] = (
+                    p["Value"],
+                    p["Version"],
+                )
+        return {n: values[ssm_parameter_name.normalize(n)] for n in names}
+
+    def put_secrets(self, writes):
+        """
+        writes the (secret, value, overwrite) tuples of `writes` concurrently, at no more than
+        WritesPerSecond. Returns the versions of the written secrets and the errors by Id.
+        """
+        bucket = rate_limiter.TokenBucket(self.get("WritesPerSecond"))
+        deadline = write_scheduler.deadline(self.context)
+
+        def put(secret, value, overwrite):
+            kwargs = {
+                "Name": secret["Name"],
+                "KeyId": self.get("KeyAlias"),
+                "Type": "SecureString",
+                "Overwrite": overwrite,
+                "Value": value,
+            }
+            if secret.get("Description"):
+                kwargs["Description"] = secret["Description"]
+            write_scheduler.acquire(bucket, deadline)
+            response = write_scheduler.put_parameter(self.ssm, self.context, **kwargs)
+            return response["Version"] if "Version" in response else 1
+
+        versions, errors = {}, {}
+        futures = [(w[0], aws_clients.executor().submit(put, *w)) for w in writes]
+        for secret, future in futures:
+            try:
+                versions[secret["Id"]] = future.result()
+            except ClientError as e:
+                errors[secret["Id"]] = e
+        return versions, errors
+
+    def delete_secrets(self, names):
+        for i in range(0, len(names), 10):
+            self.ssm.delete_parameters(Names=names[i : i + 10])
+
+    def set_secret_attributes(self, secret, value, version):
+        arn = self.secret_arn(secret)
+        prefix = secret["Id"]
+        self.set_attribute(prefix + ".Arn", arn)
+        self.set_attribute(
+            prefix + ".Hash", hashlib.md5(value.encode("utf8")).hexdigest()
+        )
+        self.set_attribute(prefix + ".Version", version)
+        self.set_attribute(prefix + ".ParameterName", ssm_parameter_name.from_arn(arn))
+        if self.get("ReturnSecret"):
+            self.set_attribute(prefix + ".Secret", value)
+
+    def write_secrets(self, existing):
+        """
+        writes the secrets of the set. The secrets in `existing`, a map of names to their
+        current value and version, or to None to refresh them, are overwritten. A secret which
+        keeps its value, Description and KeyAlias is not written, and keeps its version.
+        """
+        old_descriptions = {
+            s["Name"]: s.get("Description", "") for s in self.get_old("Secrets", [])
+        }
+        key_alias_unchanged = property_changes.unchanged(self, ["KeyAlias"])
+
+        writes, unchanged = [], []
+        for secret in self.get("Secrets"):
+            name = secret["Name"]
+            current = existing.get(name)
+            description = secret.get("Description", "")
+            if current is None:
+                value = self.secret_password_policy(secret).generate()
+                writes.append((secret, value, name in existing))
+            elif key_alias_unchanged and description == old_descriptions.get(name):
+                unchanged.append((secret,) + current)
+            else:
+                writes.append((secret, current[0], True))
+
+        versions, errors = self.put_secrets(writes)
+        for secret, value, version in unchanged:
+            self.set_secret_attributes(secret, value, version)
+        for secret, value, _ in writes:
+            if secret["Id"] in versions:
+                self.set_secret_attributes(secret, value, versions[secret["Id"]])
+        self.no_echo = self.get("NoEcho")
+
+        if errors:
+            self.fail(
+                "failed to write {} of {} secrets, {}".format(
+                    len(errors),
+                    len(writes),
+                    "; ".join("{}: {}".format(k, v) for k, v in errors.items()),
+                )
+            )
+        return [w[0]["Name"] for w in writes if w[0]["Id"] in versions]
+
+    def create(self):
+        written = self.write_secrets({})
+        if self.status == "FAILED":
+            self.physical_resource_id = "could-not-create"
+            try:
+                self.delete_secrets(written)
+            except ClientError as e:
+                log.error("failed to delete the partially created set, %s", e)
+        else:
+            self.physical_resource_id = self.set_id
+
+    def update(self):
+        old_names = [s["Name"] for s in self.get_old("Secrets", [])]
+        names = [s["Name"] for s in self.get("Secrets")]
+        kept = [n for n in names if n in old_names]
+        try:
+            if self.refresh_on_update:
+                existing = {n: None for n in kept}
+            else:
+                existing = self.get_secrets(kept)
+        except (ClientError, ValueError) as e:
+            self.fail(str(e))
+            return
+
+        self.write_secrets(existing)
+        if self.status == "FAILED":
+            return
+
+        removed = [n for n in old_names if n not in names]
+        try:
+            self.delete_secrets(removed)
+        except ClientError as e:
+            self.fail(str(e))
+
+    def delete(self):
+        if not self.physical_resource_id.startswith("secret-set-"):
+            self.success(
+                "Secret set with the name %s is ignored" % self.physical_resource_id
+            )
+            return
+
+        try:
+            self.delete_secrets([s["Name"] for s in self.get("Secrets")])
+        except ClientError as e:
+            self.fail(str(e))
+
+
+provider = SecretSetProvider()
+
+
+def handler(request, context):
+    return provider.handle(request, context)
@@ -3,10 +3,12 @@ import logging
 import os
 import re
 
-import boto3
 from botocore.exceptions import ClientError
 from cfn_resource_provider import ResourceProvider
 
+import aws_clients
+import caller_identity
+
 log = logging.getLogger()
 log.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
@@ -71,9 +73,18 @@ class SecretsManagerSecretProvider(ResourceProvider):
         super(SecretsManagerSecretProvider, self).__init__()
         self._value = None
         self.request_schema = request_schema
-        self.sm = boto3.client("secretsmanager")
-        self.region = boto3.session.Session().region_name
-        self.account_id = (boto3.client("sts")).get_caller_identity()["Account"]
+
+    @property
+    def sm(self):
+        return aws_clients.client("secretsmanager")
+
+    @property
+    def region(self):
+        return caller_identity.region()
+
+    @property
+    def account_id(self):
+        return caller_identity.account_id()
 
     def convert_property_types(self):
         try:
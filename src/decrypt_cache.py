@@ -0,0 +1,99 @@
+"""
+a bounded cache of KMS decrypt results, with a time to live.
+
+CloudFormation sends the same EncryptedContent on every create and update of a secret, and
+often for several resources. The plaintext is cached in memory per digest of the ciphertext blob
+and its key context, for at most `ttl` seconds and `max_entries` entries. The plaintext is kept
+in a bytearray, which is overwritten with zeros when the entry expires or is evicted.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class DecryptCache(object):
+    def __init__(self, max_entries=64, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # entries by digest, in the order of insertion and therefore of expiry
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(ciphertext_blob, encryption_context=None, key_id=None):
+        """
+        returns the cache key of the `ciphertext_blob` and its key context.
+        """
+        context = json.dumps([key_id, encryption_context or {}], sort_keys=True)
+        result = hashlib.sha256(context.encode("utf8"))
+        result.update(b"\0")
+        result.update(ciphertext_blob)
+        return result.digest()
+
+    def _evict(self, digest):
+        _, plaintext = self._entries.pop(digest)
+        plaintext[:] = bytes(len(plaintext))
+
+    def _expire(self, now):
+        while self._entries:
+            digest, (expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            self._evict(digest)
+
+    def get(self, digest):
+        """
+        returns the cached plaintext of `digest`, or None if it is not cached.
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(digest)
+            return bytes(entry[1]) if entry else None
+
+    def put(self, digest, plaintext):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if digest in self._entries:
+                self._evict(digest)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._evict(next(iter(self._entries)))
+            if self.max_entries > 0:
+                self._entries[digest] = (now + self.ttl, bytearray(plaintext))
+
+    def clear(self):
+        with self._lock:
+            for digest in list(self._entries):
+                self._evict(digest)
+
+    def decrypt(self, kms, ciphertext_blob, encryption_context=None, key_id=None):
+        """
+        returns the plaintext of the `ciphertext_blob`, decrypted with the `kms` client on a miss.
+        """
+        digest = self.digest(ciphertext_blob, encryption_context, key_id)
+        result = self.get(digest)
+        if result is None:
+            kwargs = {"CiphertextBlob": ciphertext_blob}
+            if encryption_context:
+                kwargs["EncryptionContext"] = encryption_context
+            if key_id:
+                kwargs["KeyId"] = key_id
+            result = kms.decrypt(**kwargs)["Plaintext"]
+            self.put(digest, result)
+        return result
+
+
+cache = DecryptCache(
+    int(os.getenv("DECRYPT_CACHE_SIZE", "64")),
+    float(os.getenv("DECRYPT_CACHE_TTL", "300")),
+)
+
+
+def decrypt(kms, ciphertext_blob, encryption_context=None, key_id=None):
+    """
+    returns the plaintext of the `ciphertext_blob` from the shared cache, or from `kms`.
+    """
+    return cache.decrypt(kms, ciphertext_blob, encryption_context, key_id)
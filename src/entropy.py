@@ -0,0 +1,122 @@
+"""
+a buffered source of cryptographically secure random bytes, choices and integers.
+
+Random bytes are read from the operating system CSPRNG in blocks and handed out from a buffer,
+so generating a secret costs at most one system call instead of one per character or resource.
+Choices from an alphabet use rejection sampling, so every symbol is equally likely.
+Consumed bytes are wiped from the buffer.
+"""
+import os
+import threading
+from functools import lru_cache
+
+block_size = 4096
+
+_lock = threading.Lock()
+_buffer = memoryview(bytearray())
+_offset = 0
+_zeros = bytes(block_size)
+
+
+def token_bytes(n):
+    """
+    returns `n` random bytes.
+    """
+    global _buffer, _offset
+    if n > block_size:
+        return os.urandom(n)
+
+    with _lock:
+        if len(_buffer) - _offset < n:
+            _buffer = memoryview(bytearray(os.urandom(block_size)))
+            _offset = 0
+        end = _offset + n
+        # copied and wiped through a memoryview, without intermediate copies of the slice
+        result = _buffer[_offset:end].tobytes()
+        _buffer[_offset:end] = _zeros[:n]
+        _offset = end
+    return result
+
+
+def randbelow(n):
+    """
+    returns a random integer in the range [0, n).
+    """
+    if n <= 0:
+        raise ValueError("n must be positive")
+    bits = (n - 1).bit_length()
+    size = (bits + 7) // 8
+    while True:
+        r = int.from_bytes(token_bytes(size), "big") >> (size * 8 - bits)
+        if r < n:
+            return r
+
+
+@lru_cache(maxsize=256)
+def _byte_table(alphabet):
+    """
+    returns the table translating random bytes to symbols of `alphabet`, the bytes to reject
+    -those from the largest multiple of its size, to avoid a modulo bias- the number of accepted
+    bytes, and whether the symbols are latin-1 encoded characters rather than indices.
+    """
+    n = len(alphabet)
+    limit = 256 - 256 % n
+    encoded = isinstance(alphabet, str) and all(ord(c) < 256 for c in alphabet)
+    symbols = alphabet.encode("latin-1") if encoded else bytes(range(n))
+    table = bytes(symbols[b % n] for b in range(256))
+    return table, bytes(range(limit, 256)), limit, encoded
+
+
+def choices(alphabet, k):
+    """
+    returns a list of `k` symbols chosen at random from `alphabet`.
+    """
+    n = len(alphabet)
+    if n == 0:
+        raise IndexError("cannot choose from an empty alphabet")
+    if n > 256:
+        return [alphabet[randbelow(n)] for _ in range(k)]
+
+    # rejects and translates the random bytes in C, instead of byte by byte
+    key = alphabet if isinstance(alphabet, (str, tuple)) else tuple(alphabet)
+    table, rejected, limit, encoded = _byte_table(key)
+    result = []
+    while len(result) < k:
+        needed = k - len(result)
+        data = token_bytes(needed * 256 // limit + 8).translate(table, rejected)
+        if encoded:
+            result.extend(data[:needed].decode("latin-1"))
+        else:
+            result.extend([alphabet[i] for i in data[:needed]])
+    return result
+
+
+def shuffle(symbols, count=None):
+    """
+    shuffles the list `symbols` in place. If `count` is given, only the first `count` symbols
+    are moved to random positions, which suffices when the other symbols are independent draws
+    from a single alphabet.
+    """
+    n = len(symbols)
+    count = n - 1 if count is None else min(count, n - 1)
+    if count <= 0:
+        return
+    if n > 65536:
+        for i in range(count):
+            j = i + randbelow(n - i)
+            symbols[i], symbols[j] = symbols[j], symbols[i]
+        return
+
+    # draw the 16-bit random words of all swaps at once, with some extra for rejections
+    words = iter(memoryview(token_bytes(2 * count + 16)).cast("H"))
+    for i in range(count):
+        bound = n - i
+        limit = 65536 - 65536 % bound
+        for r in words:
+            if r < limit:
+                j = i + r % bound
+                break
+        else:
+            # the extra words were all rejected, which is very unlikely
+            j = i + randbelow(bound)
+        symbols[i], symbols[j] = symbols[j], symbols[i]
@@ -0,0 +1,77 @@
+"""
+envelope encryption of secrets: a KMS encrypted data key with an AES-GCM encrypted payload.
+
+KMS encrypts at most 4 KB, and costs a call per ciphertext. An envelope is encrypted with a
+256 bit data key from kms:GenerateDataKey instead, and carries the data key encrypted by KMS:
+
+    magic (8) | length of the encrypted data key (2) | encrypted data key | nonce (12) | payload
+
+The magic, length and encrypted data key are authenticated as associated data of the payload.
+Secrets encrypted with the same data key need a single KMS call to decrypt the data key.
+"""
+import os
+import struct
+
+magic = b"CFNSENV1"
+header = struct.Struct(">8sH")
+nonce_size = 12
+
+
+def is_envelope(blob):
+    """
+    true if the `blob` is an envelope, rather than a KMS ciphertext.
+    """
+    return blob[: len(magic)] == magic
+
+
+def parse(blob):
+    """
+    returns the encrypted data key, the associated data, the nonce and the payload of the
+    envelope `blob`. Raises a ValueError if the blob is not an envelope.
+    """
+    if len(blob) < header.size or not is_envelope(blob):
+        raise ValueError("not an envelope")
+    _, key_length = header.unpack_from(blob)
+    offset = header.size + key_length
+    # the payload holds at least the 16 byte authentication tag
+    if key_length == 0 or len(blob) < offset + nonce_size + 16:
+        raise ValueError("the envelope is truncated")
+    return (
+        blob[header.size : offset],
+        blob[:offset],
+        blob[offset : offset + nonce_size],
+        blob[offset + nonce_size :],
+    )
+
+
+def seal(data_key, encrypted_data_key, plaintext):
+    """
+    returns the envelope of the `plaintext`, encrypted with the `data_key`.
+    """
+    # imported on use, so that providers handling no envelopes do not load cryptography
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    associated_data = header.pack(magic, len(encrypted_data_key)) + encrypted_data_key
+    nonce = os.urandom(nonce_size)
+    return (
+        associated_data
+        + nonce
+        + AESGCM(data_key).encrypt(nonce, plaintext, associated_data)
+    )
+
+
+def unseal(blob, decrypt_data_key):
+    """
+    returns the plaintext of the envelope `blob`. `decrypt_data_key` is called with the encrypted
+    data key, and returns the data key. Raises a ValueError if the envelope is invalid.
+    """
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    encrypted_data_key, associated_data, nonce, payload = parse(blob)
+    try:
+        return AESGCM(decrypt_data_key(encrypted_data_key)).decrypt(
+            nonce, payload, associated_data
+        )
+    except InvalidTag:
+        raise ValueError("the envelope could not be decrypted")
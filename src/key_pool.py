@@ -0,0 +1,122 @@
+"""
+an in-process pool of pre-generated private keys.
+
+Generating a large private key can take seconds on a small Lambda function. The pool keeps a
+few keys ready per key specification, generated by a background thread while no request is
+generating a key itself. A request takes a ready key from the pool and only generates one inline
+when the pool is empty, after trying to claim one from an optional durable store. The background
+thread only fills the pool for specifications which have been requested before.
+"""
+import logging
+import threading
+from collections import deque
+
+log = logging.getLogger()
+
+
+class KeyPool(object):
+    def __init__(self, name, generate, size, claim=None):
+        """
+        a pool of `size` keys per specification, where `generate(*spec)` returns a new key.
+        A size of 0 disables the pool. On a miss, `claim(*spec)` is called first to obtain a
+        pre-generated key from elsewhere, if specified. It returns None if no key is available.
+        """
+        self.name = name
+        self.generate = generate
+        self.claim = claim
+        self.size = size
+        self.keys = {}
+        self.hits = 0
+        self.misses = 0
+        self._busy = 0
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def get(self, *spec):
+        """
+        returns a key for `spec` from the pool, or a newly generated key if the pool is empty.
+        """
+        with self._condition:
+            keys = self.keys.get(spec)
+            key = keys.popleft() if keys else None
+            if key is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._busy += 1
+            log.info(
+                "%s pool %s for %s, hits=%d, misses=%d",
+                self.name,
+                "hit" if key is not None else "miss",
+                spec,
+                self.hits,
+                self.misses,
+            )
+
+        if key is None:
+            try:
+                key = self.claim_key(spec)
+                if key is None:
+                    key = self.generate(*spec)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+
+        if self.size > 0:
+            with self._condition:
+                self.keys.setdefault(spec, deque())
+                self._start_worker()
+                self._condition.notify()
+        return key
+
+    def claim_key(self, spec):
+        if self.claim is None:
+            return None
+        try:
+            key = self.claim(*spec)
+        except Exception as e:
+            log.warning("%s pool failed to claim key for %s, %s", self.name, spec, e)
+            return None
+        log.info(
+            "%s pool claim %s for %s",
+            self.name,
+            "hit" if key is not None else "miss",
+            spec,
+        )
+        return key
+
+    def _start_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._fill, name="%s pool" % self.name, daemon=True
+            )
+            self._worker.start()
+
+    def _next_spec(self):
+        if self._busy > 0:
+            return None
+        for spec, keys in self.keys.items():
+            if len(keys) < self.size:
+                return spec
+        return None
+
+    def _fill(self):
+        while True:
+            with self._condition:
+                spec = self._next_spec()
+                while spec is None:
+                    self._condition.wait()
+                    spec = self._next_spec()
+            try:
+                key = self.generate(*spec)
+            except Exception as e:
+                log.error(
+                    "%s pool failed to generate key for %s, %s", self.name, spec, e
+                )
+                with self._condition:
+                    self.keys.pop(spec, None)
+                continue
+
+            with self._condition:
+                if spec in self.keys:
+                    self.keys[spec].append(key)
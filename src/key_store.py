@@ -0,0 +1,91 @@
+"""
+durable stores of pre-generated private keys, which survive cold starts.
+
+A store keeps PEM encoded keys per key specification. A key is handed out by `claim`, which
+removes it atomically from the store: concurrent claims never return the same key. The
+ParameterStoreKeyStore keeps the keys as SecureString parameters under a reserved path, the
+InMemoryKeyStore is a local stand-in with the same behaviour.
+"""
+import logging
+import random
+import threading
+import uuid
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+import write_scheduler
+
+log = logging.getLogger()
+
+
+class ParameterStoreKeyStore(object):
+    def __init__(self, path, key_alias="alias/aws/ssm"):
+        self.path = path.rstrip("/")
+        self.key_alias = key_alias
+
+    @property
+    def ssm(self):
+        return aws_clients.client("ssm")
+
+    def prefix(self, spec):
+        return "{}/{}/".format(self.path, "-".join(map(str, spec)))
+
+    def put(self, spec, value):
+        write_scheduler.put_parameter(
+            self.ssm,
+            Name="{}{}".format(self.prefix(spec), uuid.uuid4().hex),
+            Value=value,
+            Type="SecureString",
+            KeyId=self.key_alias,
+            Overwrite=False,
+        )
+
+    def count(self, spec):
+        result = 0
+        paginator = self.ssm.get_paginator("get_parameters_by_path")
+        for page in paginator.paginate(Path=self.prefix(spec)):
+            result += len(page["Parameters"])
+        return result
+
+    def claim(self, spec):
+        """
+        returns a key for `spec` and deletes it from the store, or None if no key is available.
+        Only one of the concurrent deletes of a parameter succeeds, the others lost the claim.
+        The names are listed without decryption, so that only the claimed key is decrypted.
+        """
+        response = self.ssm.get_parameters_by_path(
+            Path=self.prefix(spec), MaxResults=10
+        )
+        names = [parameter["Name"] for parameter in response["Parameters"]]
+        # spread concurrent claims over the available keys
+        random.shuffle(names)
+        for name in names:
+            try:
+                response = self.ssm.get_parameter(Name=name, WithDecryption=True)
+                self.ssm.delete_parameter(Name=name)
+                return response["Parameter"]["Value"]
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ParameterNotFound":
+                    raise
+                log.debug("key %s was claimed by another request", name)
+        return None
+
+
+class InMemoryKeyStore(object):
+    def __init__(self):
+        self.keys = {}
+        self._lock = threading.Lock()
+
+    def put(self, spec, value):
+        with self._lock:
+            self.keys.setdefault(tuple(spec), []).append(value)
+
+    def count(self, spec):
+        with self._lock:
+            return len(self.keys.get(tuple(spec), []))
+
+    def claim(self, spec):
+        with self._lock:
+            keys = self.keys.get(tuple(spec))
+            return keys.pop() if keys else None
@@ -0,0 +1,72 @@
+"""
+a compiled password policy: the alphabet, the required characters and the length of a secret.
+
+A policy is validated once, and the symbols of its alphabets are drawn with entropy.choices,
+which caches the translation table of each alphabet. Compiled policies are cached per container,
+so identical policies of many resources share a single instance.
+"""
+from functools import lru_cache
+
+import entropy
+
+
+class SymbolTable(object):
+    def __init__(self, alphabet, count):
+        """
+        `count` symbols to draw from `alphabet`.
+        """
+        if not alphabet:
+            raise ValueError("the alphabet of a password policy cannot be empty")
+        self.alphabet = alphabet
+        self.count = count
+
+    def draw(self, result):
+        """
+        appends `count` random symbols to `result`.
+        """
+        result.extend(entropy.choices(self.alphabet, self.count))
+
+
+class PasswordPolicy(object):
+    def __init__(self, alphabet, length, required=()):
+        """
+        a policy for passwords of `length` symbols from `alphabet`, with the `required`
+        (count, alphabet) pairs of symbols.
+        """
+        required_count = sum(count for count, _ in required)
+        if required_count > length:
+            raise ValueError(
+                f"the length should at least exceed the {required_count} required characters"
+            )
+        self.length = length
+        self.required_count = required_count
+        self.tables = [SymbolTable(a, count) for count, a in required if count > 0]
+        self.tables.append(SymbolTable(alphabet, length - required_count))
+
+    def generate(self):
+        """
+        returns a new password, with the required symbols at random positions.
+        """
+        result = []
+        for table in self.tables:
+            table.draw(result)
+        # the required symbols are drawn first, and moved to random positions
+        entropy.shuffle(result, self.required_count)
+        return "".join(result)
+
+
+@lru_cache(maxsize=256)
+def _compile(alphabet, length, required):
+    return PasswordPolicy(alphabet, length, required)
+
+
+def compile(alphabet, length, required=None):
+    """
+    returns the password policy for `alphabet`, `length` and the `required` list of
+    {"Count", "Alphabet"} objects. Raises a ValueError if no password can satisfy the policy.
+    """
+    return _compile(
+        alphabet,
+        length,
+        tuple((r["Count"], r["Alphabet"]) for r in required or []),
+    )
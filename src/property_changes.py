@@ -0,0 +1,17 @@
+"""
+detects which properties of a resource an update changes.
+"""
+
+
+def unchanged(provider, names):
+    """
+    true if the update request of `provider` keeps the properties `names`. A property absent from
+    the old properties had its schema default, so setting it explicitly is a change.
+    """
+    if "OldResourceProperties" not in provider.request:
+        return False
+    properties = provider.request_schema["properties"]
+    return all(
+        provider.get(name) == provider.get_old(name, properties[name].get("default"))
+        for name in names
+    )
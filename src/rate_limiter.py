@@ -0,0 +1,50 @@
+"""
+a token bucket to limit the rate of API calls shared by concurrent threads.
+"""
+import threading
+import time
+
+
+class TokenBucket(object):
+    def __init__(self, rate, capacity=None):
+        """
+        allows on average `rate` calls per second, with bursts of up to `capacity` calls.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None) -> bool:
+        """
+        takes a token from the bucket, waiting until one is available. Returns False without
+        taking a token if none becomes available within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+                if deadline is not None and now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def set_rate(self, rate, drain=False):
+        """
+        changes the rate of the bucket to `rate` calls per second. With `drain`, the tokens
+        left in the bucket are discarded.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if drain:
+                self.tokens = 0.0
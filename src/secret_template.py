@@ -0,0 +1,115 @@
+"""
+a template of a composite JSON secret, with fields generated by a password policy, random bytes
+or a reference to another field.
+
+A value in the template is generated when it is an object with a single generator:
+
+    {"Password": {"Alphabet": ..., "Length": ..., "Required": [...]}}
+    {"RandomBytes": {"Length": ...}}
+    {"Field": "<name of a top-level field>"}
+
+All other values are copied as is. A Field refers to a top-level field which does not refer to
+another field itself.
+The template is validated once when it is compiled, and rendered into the JSON value of a
+single secret.
+"""
+import base64
+import json
+
+import entropy
+import password_policy
+
+
+class SecretTemplate(object):
+    def __init__(self, template, alphabet, length, required=None):
+        """
+        compiles the `template`. Password fields default to the `alphabet`, `length` and
+        `required` characters of the secret. Raises a ValueError if the template is invalid.
+        """
+        if not isinstance(template, dict) or not template:
+            raise ValueError("the content template must be a non-empty object")
+        self.template = template
+        self.defaults = {"Alphabet": alphabet, "Length": length, "Required": required}
+        self.generators = {}
+        for name, value in template.items():
+            self._compile(value, (name,))
+
+        self.referring = set(
+            p[0] for p, g in self.generators.items() if g[0] == "Field"
+        )
+        for path, (kind, name) in self.generators.items():
+            if kind == "Field" and (name not in template or name in self.referring):
+                raise ValueError(
+                    "{}: the Field {} should be a top-level field which does not refer "
+                    "to another field".format(".".join(map(str, path)), name)
+                )
+
+    def _compile(self, value, path):
+        if isinstance(value, dict):
+            generator = self._generator(value, path) if len(value) == 1 else None
+            if generator:
+                self.generators[path] = generator
+            else:
+                for name, v in value.items():
+                    self._compile(v, path + (name,))
+        elif isinstance(value, list):
+            for i, v in enumerate(value):
+                self._compile(v, path + (i,))
+
+    def _generator(self, value, path):
+        kind, spec = next(iter(value.items()))
+        expected = str if kind == "Field" else dict
+        if spec is not None and not isinstance(spec, expected):
+            return None
+        try:
+            if kind == "Password":
+                spec = spec or {}
+                required = spec.get("Required", self.defaults["Required"]) or []
+                policy = password_policy.compile(
+                    spec.get("Alphabet", self.defaults["Alphabet"]),
+                    int(spec.get("Length", self.defaults["Length"])),
+                    [
+                        {"Count": int(r["Count"]), "Alphabet": r["Alphabet"]}
+                        for r in required
+                    ],
+                )
+                return kind, policy
+            elif kind == "RandomBytes":
+                length = int((spec or {}).get("Length", 8))
+                if not 1 <= length <= 512:
+                    raise ValueError("the length should be between 1 and 512")
+                return kind, length
+            elif kind == "Field" and spec is not None:
+                return kind, spec
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(
+                "{}: invalid {} generator, {}".format(".".join(map(str, path)), kind, e)
+            )
+        return None
+
+    def _render(self, value, path, fields):
+        if path in self.generators:
+            kind, spec = self.generators[path]
+            if kind == "Password":
+                return spec.generate()
+            elif kind == "RandomBytes":
+                return base64.b64encode(entropy.token_bytes(spec)).decode("ascii")
+            else:
+                return fields[spec]
+        if isinstance(value, dict):
+            return {n: self._render(v, path + (n,), fields) for n, v in value.items()}
+        elif isinstance(value, list):
+            return [self._render(v, path + (i,), fields) for i, v in enumerate(value)]
+        return value
+
+    def render(self):
+        """
+        returns the JSON value of a new secret from the template.
+        """
+        fields = {}
+        for name, value in self.template.items():
+            if name not in self.referring:
+                fields[name] = self._render(value, (name,), fields)
+        for name in self.referring:
+            fields[name] = self._render(self.template[name], (name,), fields)
+        return json.dumps({name: fields[name] for name in self.template})
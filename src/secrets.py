@@ -1,32 +1,41 @@
-import os
+import importlib
 import logging
+import os
 
-import cfn_secret_provider
-import cfn_rsakey_provider
-import cfn_keypair_provider
-import cfn_accesskey_provider
-import cfn_dsakey_provider
-import cfn_read_only_secret_provider
-import cfn_secrets_manager_secret_provider
-import cfn_random_bytes_provider
+import caller_identity
 
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
+# maps the custom resource type to the module implementing the provider. A module
+# is imported -and its provider constructed- on the first request for the type, so
+# a container only loads the providers, clients and libraries it actually serves.
+providers = {
+    "Custom::Secret": "cfn_secret_provider",
+    "Custom::SecretSet": "cfn_secret_set_provider",
+    "Custom::RSAKey": "cfn_rsakey_provider",
+    "Custom::DSAKey": "cfn_dsakey_provider",
+    "Custom::ECKey": "cfn_eckey_provider",
+    "Custom::KeyPair": "cfn_keypair_provider",
+    "Custom::AccessKey": "cfn_accesskey_provider",
+    "Custom::SecretsManagerSecret": "cfn_secrets_manager_secret_provider",
+    "Custom::ReadOnlySecret": "cfn_read_only_secret_provider",
+    "Custom::RandomBytes": "cfn_random_bytes_provider",
+}
+
+_handlers = {}
+
+
+def get_handler(resource_type):
+    """
+    returns the handler for the `resource_type`, importing the provider module on first use.
+    Unknown resource types are passed to the Custom::Secret provider, which will report them.
+    """
+    module_name = providers.get(resource_type, providers["Custom::Secret"])
+    if module_name not in _handlers:
+        _handlers[module_name] = importlib.import_module(module_name).handler
+    return _handlers[module_name]
+
 
 def handler(request, context):
-    if request["ResourceType"] == "Custom::RSAKey":
-        return cfn_rsakey_provider.handler(request, context)
-    if request["ResourceType"] == "Custom::DSAKey":
-        return cfn_dsakey_provider.handler(request, context)
-    elif request["ResourceType"] == "Custom::KeyPair":
-        return cfn_keypair_provider.handler(request, context)
-    elif request["ResourceType"] == "Custom::AccessKey":
-        return cfn_accesskey_provider.handler(request, context)
-    elif request["ResourceType"] == "Custom::SecretsManagerSecret":
-        return cfn_secrets_manager_secret_provider.handler(request, context)
-    elif request["ResourceType"] == "Custom::ReadOnlySecret":
-        return cfn_read_only_secret_provider.handler(request, context)
-    elif request["ResourceType"] == "Custom::RandomBytes":
-        return cfn_random_bytes_provider.handler(request, context)
-    else:
-        return cfn_secret_provider.handler(request, context)
+    caller_identity.resolve(request, context)
+    return get_handler(request["ResourceType"])(request, context)
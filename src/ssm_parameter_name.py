@@ -22,7 +22,13 @@ def from_arn(arn):
 
     """
     m = arn_regexp.match(arn)
-    name = m.group("name") if m else None
+    return normalize(m.group("name")) if m else None
+
+
+def normalize(name):
+    """
+    returns the name as stored by the Parameter Store: hierarchical names start with a '/'.
+    """
     return name if not name or "/" not in name or name[0] == "/" else "/{}".format(name)
 
 
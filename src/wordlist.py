@@ -0,0 +1,103 @@
+"""
+a memory-mapped word list, for passphrases.
+
+The words are stored as fixed-width, zero-padded UTF-8 records after a 16 byte header, so
+the list is opened without reading or allocating the words: a word is read from the mapped file
+when it is indexed. Build the file from a text word list, one word per line optionally preceded
+by its dice numbers as in the EFF lists, with:
+
+    python src/wordlist.py eff_large_wordlist.txt src/wordlist.bin
+"""
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+
+magic = b"WORDLST1"
+header = struct.Struct("<8sIH2x")
+
+default_path = os.getenv(
+    "WORDLIST_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordlist.bin"),
+)
+
+
+class Wordlist(object):
+    def __init__(self, path):
+        """
+        maps the word list file at `path` into memory. Raises a ValueError if it is not a
+        word list.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < header.size:
+            raise ValueError("{} is not a word list".format(path))
+        file_magic, self.count, self.width = header.unpack_from(self._map)
+        if (
+            file_magic != magic
+            or self.width == 0
+            or len(self._map) != header.size + self.count * self.width
+        ):
+            raise ValueError("{} is not a word list".format(path))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("word list index out of range")
+        offset = header.size + index * self.width
+        return self._map[offset : offset + self.width].rstrip(b"\0").decode("utf8")
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    return Wordlist(path)
+
+
+def load(path=None):
+    """
+    returns the word list at `path`, or at the default path, mapped once per container.
+    """
+    return _load(path or default_path)
+
+
+def build(words):
+    """
+    returns the word list file contents of `words`. Raises a ValueError on duplicate or
+    empty words.
+    """
+    encoded = [w.encode("utf8") for w in words]
+    if len(set(encoded)) != len(encoded):
+        raise ValueError("the word list contains duplicate words")
+    if not all(encoded) or any(b"\0" in w for w in encoded):
+        raise ValueError("the word list contains empty or invalid words")
+    width = max(map(len, encoded), default=1)
+    return header.pack(magic, len(encoded), width) + b"".join(
+        w.ljust(width, b"\0") for w in encoded
+    )
+
+
+def read_words(lines):
+    """
+    returns the words of a text word list, skipping empty lines and dice numbers.
+    """
+    result = []
+    for line in lines:
+        fields = line.split()
+        if fields:
+            result.append(fields[-1])
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.stderr.write("Usage: {} <word list> <output file>\n".format(sys.argv[0]))
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding="utf8") as f:
+        words = read_words(f)
+    with open(sys.argv[2], "wb") as f:
+        f.write(build(words))
+    sys.stderr.write("wrote {} words to {}\n".format(len(words), sys.argv[2]))
@@ -0,0 +1,165 @@
+"""
+a scheduler of SSM parameter writes, shared by all providers in the container.
+
+PutParameter has a low rate limit per account and region, and CloudFormation creates many
+resources in parallel. A write first takes a token from a token bucket, which adapts to the
+limit: the rate is halved when a write is throttled, and recovers gradually as writes succeed.
+Throttled writes, and writes which failed with a server or connection error, are retried with an
+exponential backoff and full jitter, for as long as the request has time left to report its
+result to CloudFormation. The writes are sent through a separate client without the retries of
+botocore, so that every throttled attempt slows down the bucket and no retry runs past the
+deadline.
+"""
+import logging
+import os
+import random
+import time
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+import aws_clients
+import rate_limiter
+
+log = logging.getLogger()
+
+# the errors of a write which are retried
+retryable_errors = {
+    "ThrottlingException",
+    "TooManyUpdates",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "RequestTimeout",
+    "RequestTimeoutException",
+}
+
+# the status codes of server errors, and the exceptions of connection errors, which are retried
+retryable_status_codes = {500, 502, 503, 504}
+connection_errors = (ConnectionError, HTTPClientError)
+
+# seconds of the remaining time of the invocation, reserved to report the result
+reserve = 5.0
+
+
+def client(ssm):
+    """
+    returns the shared client for the writes of the `ssm` client, in the same region and without
+    the retries of botocore. Like the `ssm` clients of the providers, it has the credentials of
+    the session.
+    """
+    return aws_clients.client("ssm", ssm.meta.region_name, retries=False)
+
+
+def retryable_error(e):
+    """
+    returns the error code of the exception `e` of a write if the write is retried, or None.
+    """
+    if isinstance(e, connection_errors):
+        return type(e).__name__
+    code = e.response["Error"]["Code"]
+    status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    if code in retryable_errors or status in retryable_status_codes:
+        return code
+    return None
+
+
+def acquire(bucket, deadline):
+    """
+    takes a token from the `bucket` before `deadline`, a time.monotonic() value, or raises a
+    ClientError ThrottlingException if none is available in time.
+    """
+    timeout = None if deadline is None else deadline - time.monotonic()
+    if not bucket.acquire(timeout):
+        raise ClientError(
+            {
+                "Error": {
+                    "Code": "ThrottlingException",
+                    "Message": "no parameter store write capacity left in time",
+                }
+            },
+            "PutParameter",
+        )
+
+
+class WriteScheduler(object):
+    def __init__(
+        self, rate=10.0, min_rate=0.5, max_attempts=16, base_delay=0.1, max_delay=5.0
+    ):
+        """
+        schedules writes at no more than `rate` per second. A throttled write is retried up to
+        `max_attempts` times, after a random delay of at most `base_delay` seconds doubled for
+        each attempt, capped at `max_delay`.
+        """
+        self.max_rate = float(rate)
+        self.min_rate = float(min(min_rate, rate))
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = rate_limiter.TokenBucket(rate)
+
+    def throttled(self):
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def succeeded(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(
+                min(self.max_rate, self.bucket.rate + self.max_rate / 10)
+            )
+
+    def put_parameter(self, ssm, deadline=None, **kwargs):
+        """
+        writes the parameter `kwargs` with the `ssm` client and returns the response. Throttled
+        writes and transient errors are retried until `deadline`, a time.monotonic() value, after
+        which the last error is raised.
+        """
+        attempt = 0
+        while True:
+            acquire(self.bucket, deadline)
+            try:
+                response = ssm.put_parameter(**kwargs)
+                self.succeeded()
+                return response
+            except (ClientError,) + connection_errors as e:
+                code = retryable_error(e)
+                if code is None:
+                    raise
+                if code == "ThrottlingException":
+                    self.throttled()
+
+                attempt += 1
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** attempt)
+                )
+                if attempt >= self.max_attempts or (
+                    deadline is not None and time.monotonic() + delay > deadline
+                ):
+                    raise
+                log.warning(
+                    "write of parameter %s failed with %s, retrying in %.2fs",
+                    kwargs.get("Name"),
+                    code,
+                    delay,
+                )
+                time.sleep(delay)
+
+
+def deadline(context):
+    """
+    returns the time.monotonic() deadline for the writes of the Lambda invocation `context`, or
+    None if the context has no remaining time.
+    """
+    if hasattr(context, "get_remaining_time_in_millis"):
+        return (
+            time.monotonic() + context.get_remaining_time_in_millis() / 1000 - reserve
+        )
+    return None
+
+
+scheduler = WriteScheduler(float(os.getenv("SSM_WRITES_PER_SECOND", "10")))
+
+
+def put_parameter(ssm, context=None, **kwargs):
+    """
+    writes the parameter `kwargs` with the client for the writes of the `ssm` client, through the
+    shared scheduler, within the remaining time of the invocation `context`.
+    """
+    return scheduler.put_parameter(client(ssm), deadline(context), **kwargs)
@@ -0,0 +1,56 @@
+"""
+records the API calls of a boto3 client through its botocore event hooks.
+
+Each call is answered by the handler for its operation, without a request to AWS, so that
+tests can assert the number and order of the calls a provider makes. The calls of an SSM client
+include the writes sent through the scheduler.
+"""
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+
+import write_scheduler
+
+
+class ApiCalls(object):
+    def __init__(self, client, handlers):
+        """
+        answers the calls of `client` with `handlers`, a map of operation names to functions
+        taking the call parameters and returning the response. A handler may raise a ClientError.
+        """
+        self.clients = [client]
+        if client.meta.service_model.service_name == "ssm":
+            self.clients.append(write_scheduler.client(client))
+        self.handlers = handlers
+        self.calls = []
+
+    def record(self, model, params, context, **kwargs):
+        context["api-calls"] = dict(params)
+
+    def answer(self, model, context, **kwargs):
+        params = context["api-calls"]
+        self.calls.append((model.name, params))
+        response = self.handlers[model.name](params)
+        return AWSResponse(None, 200, {}, None), response
+
+    def __enter__(self):
+        for client in self.clients:
+            events = client.meta.events
+            events.register(
+                "before-parameter-build", self.record, unique_id="api-calls"
+            )
+            events.register("before-call", self.answer, unique_id="api-calls-answer")
+        return self
+
+    def __exit__(self, *args):
+        for client in self.clients:
+            events = client.meta.events
+            events.unregister("before-parameter-build", unique_id="api-calls")
+            events.unregister("before-call", unique_id="api-calls-answer")
+
+    @property
+    def operations(self):
+        return [name for name, _ in self.calls]
+
+
+def client_error(code, operation_name):
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation_name)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+measures the memory used by the boto3 clients of all providers, in a fresh interpreter
+against a local AWS stand-in: every provider module is imported and every client is used once.
+
+To compare with another revision, check it out in a worktree and pass its source directory:
+
+    git worktree add /tmp/baseline <revision>
+    python tests/benchmark-clients.py --src /tmp/baseline/src
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+import secrets
+clients = []
+for module_name in sorted(set(secrets.providers.values())):
+    provider = importlib.import_module(module_name).provider
+    provider.request = {"ResourceProperties": {}}
+    for name in ["ssm", "kms", "iam", "ec2", "sm"]:
+        client = getattr(provider, name, None)
+        if client is not None:
+            clients.append(client)
+ready = time.perf_counter()
+print(json.dumps({
+    "init": ready - start,
+    "clients": len(set(map(id, clients))),
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="boto3 client memory benchmark")
+    parser.add_argument(
+        "--src", default=os.path.join(os.path.dirname(__file__), "..", "src")
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with LocalAWS() as aws:
+        env = dict(os.environ, LOG_LEVEL="WARNING", **aws.environ())
+        env["PYTHONPATH"] = os.path.abspath(args.src)
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.check_output([sys.executable, "-c", PROBE], env=env)
+            results.append(json.loads(output.decode("utf-8").splitlines()[-1]))
+
+        print("source directory : %s" % os.path.abspath(args.src))
+        print("clients          : %d" % results[0]["clients"])
+        print(
+            "init             : median %.1f ms"
+            % (1000 * statistics.median(r["init"] for r in results))
+        )
+        print(
+            "max rss          : median %d KB"
+            % statistics.median(r["maxrss_kb"] for r in results)
+        )
+
+
+if __name__ == "__main__":
+    main()
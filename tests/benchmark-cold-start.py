@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+measures the cold start of the provider: the import of the `secrets` module and the first
+Custom::Secret request, each in a fresh interpreter against a local AWS stand-in.
+
+To compare with another revision, check it out in a worktree and pass its source directory:
+
+    git worktree add /tmp/baseline <revision>
+    python tests/benchmark-cold-start.py --src /tmp/baseline/src
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+PROBE = """
+import json, resource, sys, time, uuid
+start = time.perf_counter()
+import secrets
+imported = time.perf_counter()
+request = {
+    "RequestType": "Create",
+    "ResponseURL": sys.argv[1],
+    "StackId": "arn:aws:cloudformation:eu-central-1:123456789012:stack/benchmark/guid",
+    "RequestId": str(uuid.uuid4()),
+    "ResourceType": "Custom::Secret",
+    "ServiceToken": "arn:aws:lambda:eu-central-1:123456789012:function:provider",
+    "LogicalResourceId": "Secret",
+    "ResourceProperties": {"Name": "/benchmark/%s" % uuid.uuid4()},
+}
+response = secrets.handler(request, {})
+assert response["Status"] == "SUCCESS", response["Reason"]
+handled = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first_request": handled - imported,
+    "total": handled - start,
+    "cryptography": "cryptography" in sys.modules,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cold start benchmark")
+    parser.add_argument(
+        "--src", default=os.path.join(os.path.dirname(__file__), "..", "src")
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with LocalAWS() as aws:
+        env = dict(os.environ, LOG_LEVEL="WARNING", **aws.environ())
+        env["PYTHONPATH"] = os.path.abspath(args.src)
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.check_output(
+                [sys.executable, "-c", PROBE, aws.response_url], env=env
+            )
+            results.append(json.loads(output.decode("utf-8").splitlines()[-1]))
+
+        print("source directory     : %s" % os.path.abspath(args.src))
+        for name in ["import", "first_request", "total"]:
+            print(
+                "%-21s: median %.1f ms"
+                % (name, 1000 * statistics.median(r[name] for r in results))
+            )
+        print(
+            "%-21s: median %d KB"
+            % ("max rss", statistics.median(r["maxrss_kb"] for r in results))
+        )
+        print("%-21s: %s" % ("cryptography loaded", results[0]["cryptography"]))
+        print("%-21s: %s" % ("api calls", dict(aws.calls)))
+
+
+if __name__ == "__main__":
+    main()
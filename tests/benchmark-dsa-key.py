@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+compares the generation of DSA keys with fresh domain parameters, to the generation from
+domain parameters which are generated once and reused, as with `ReuseDomainParameters`.
+"""
+import argparse
+import statistics
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import dsa
+
+
+def measure(generate, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        generate()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSA key generation benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("| key size | fresh parameters | reused parameters | speedup |")
+    print("|---------:|-----------------:|------------------:|--------:|")
+    for key_size in [1024, 2048, 3072]:
+        fresh = measure(
+            lambda: dsa.generate_private_key(
+                key_size=key_size, backend=default_backend()
+            ),
+            args.runs,
+        )
+        parameters = dsa.generate_parameters(
+            key_size=key_size, backend=default_backend()
+        )
+        reused = measure(parameters.generate_private_key, args.runs)
+        print(
+            "| %8d | %13.1f ms | %14.3f ms | %6.0fx |"
+            % (key_size, 1000 * fresh, 1000 * reused, fresh / reused)
+        )
+
+
+if __name__ == "__main__":
+    main()
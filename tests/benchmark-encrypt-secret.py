@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+compares encrypting many secrets with one launch of encrypt-secret per secret, to a single
+launch in batch mode, against a local AWS stand-in with an injected latency per API call.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+script = os.path.join(os.path.dirname(__file__), "..", "encrypt-secret")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="encrypt-secret benchmark")
+    parser.add_argument("--secrets", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with LocalAWS(delay=args.delay) as aws:
+        env = dict(os.environ, **aws.environ())
+        secrets = ["secret-%d" % i for i in range(args.secrets)]
+
+        start = time.perf_counter()
+        for secret in secrets:
+            subprocess.check_output([sys.executable, script, secret], env=env)
+        single = time.perf_counter() - start
+
+        with tempfile.NamedTemporaryFile("w", suffix=".env") as f:
+            f.write("".join("S%d=%s\n" % (i, s) for i, s in enumerate(secrets)))
+            f.flush()
+            start = time.perf_counter()
+            subprocess.check_output(
+                [
+                    sys.executable,
+                    script,
+                    "--batch",
+                    f.name,
+                    "--workers",
+                    str(args.workers),
+                    "--format",
+                    "cloudformation",
+                ],
+                env=env,
+            )
+            batch = time.perf_counter() - start
+
+    print("secrets            : %d" % args.secrets)
+    print("latency per call   : %.0f ms" % (1000 * args.delay))
+    print("one launch each    : %7.1f ms" % (1000 * single))
+    print("batch, %2d workers  : %7.1f ms" % (args.workers, 1000 * batch))
+
+
+if __name__ == "__main__":
+    main()
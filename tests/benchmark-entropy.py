@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+compares the generation of passwords and random bytes with a system call per symbol or per
+resource, to the generation from the buffered entropy pool.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import entropy  # noqa: E402
+
+
+def measure(generate, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        generate()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="entropy pool benchmark")
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+
+    system_random = random.SystemRandom()
+    alphabets = {
+        10: string.digits,
+        62: string.ascii_letters + string.digits,
+        94: string.ascii_letters + string.digits + string.punctuation,
+    }
+
+    print(
+        "| alphabet | length | random.choice | SystemRandom.choice | entropy.choices |"
+    )
+    print(
+        "|---------:|-------:|--------------:|--------------------:|----------------:|"
+    )
+    for size, alphabet in alphabets.items():
+        for length in [30, 128, 512]:
+            mersenne = measure(
+                lambda: "".join(random.choice(alphabet) for _ in range(length)),
+                args.runs,
+            )
+            system = measure(
+                lambda: "".join(system_random.choice(alphabet) for _ in range(length)),
+                args.runs,
+            )
+            pooled = measure(
+                lambda: "".join(entropy.choices(alphabet, length)), args.runs
+            )
+            print(
+                "| %8d | %6d | %10.1f us | %16.1f us | %12.1f us |"
+                % (size, length, 1e6 * mersenne, 1e6 * system, 1e6 * pooled)
+            )
+
+    print()
+    print("| bytes | os.urandom | entropy.token_bytes |")
+    print("|------:|-----------:|-------------------:|")
+    for length in [16, 32, 64, 256]:
+        direct = measure(lambda: os.urandom(length), args.runs)
+        pooled = measure(lambda: entropy.token_bytes(length), args.runs)
+        print("| %5d | %7.2f us | %15.2f us |" % (length, 1e6 * direct, 1e6 * pooled))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+compares the generation time of the key types of Custom::ECKey with RSA keys of Custom::RSAKey.
+"""
+import argparse
+import statistics
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+key_types = {
+    "RSA 2048": lambda: rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend()
+    ),
+    "RSA 4096": lambda: rsa.generate_private_key(
+        public_exponent=65537, key_size=4096, backend=default_backend()
+    ),
+    "Ed25519": ed25519.Ed25519PrivateKey.generate,
+    "P-256": lambda: ec.generate_private_key(ec.SECP256R1(), default_backend()),
+    "P-384": lambda: ec.generate_private_key(ec.SECP384R1(), default_backend()),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="key type generation benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print("| key type | median generation time |")
+    print("|----------|-----------------------:|")
+    for name, generate in key_types.items():
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            generate()
+            durations.append(time.perf_counter() - start)
+        print("| %-8s | %19.3f ms |" % (name, 1000 * statistics.median(durations)))
+
+
+if __name__ == "__main__":
+    main()
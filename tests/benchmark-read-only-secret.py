@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+measures repeated Custom::ReadOnlySecret requests for parameters in several regions, in a
+fresh interpreter against a local AWS stand-in.
+
+To compare with another revision, check it out in a worktree and pass its source directory:
+
+    git worktree add /tmp/baseline <revision>
+    python tests/benchmark-read-only-secret.py --src /tmp/baseline/src
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+PROBE = """
+import json, statistics, sys, time, uuid
+import boto3
+import cfn_read_only_secret_provider
+
+regions = ["eu-central-1", "eu-west-1", "us-east-1", "ap-southeast-2"]
+boto3.client("ssm").put_parameter(Name="/benchmark/secret", Value="s", Type="SecureString")
+durations = []
+for i in range(int(sys.argv[2])):
+    request = {
+        "RequestType": "Create",
+        "ResponseURL": sys.argv[1],
+        "StackId": "arn:aws:cloudformation:eu-central-1:123456789012:stack/benchmark/guid",
+        "RequestId": str(uuid.uuid4()),
+        "ResourceType": "Custom::ReadOnlySecret",
+        "LogicalResourceId": "Secret",
+        "ResourceProperties": {"Name": "/benchmark/secret", "Region": regions[i % len(regions)]},
+    }
+    start = time.perf_counter()
+    response = cfn_read_only_secret_provider.handler(request, {})
+    durations.append(time.perf_counter() - start)
+    assert response["Status"] == "SUCCESS", response["Reason"]
+print(json.dumps({"first": durations[0], "median": statistics.median(durations[1:]), "total": sum(durations)}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="read only secret benchmark")
+    parser.add_argument(
+        "--src", default=os.path.join(os.path.dirname(__file__), "..", "src")
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with LocalAWS() as aws:
+        env = dict(os.environ, LOG_LEVEL="WARNING", **aws.environ())
+        env["PYTHONPATH"] = os.path.abspath(args.src)
+        output = subprocess.check_output(
+            [sys.executable, "-c", PROBE, aws.response_url, str(args.requests)],
+            env=env,
+        )
+        result = json.loads(output.decode("utf-8").splitlines()[-1])
+
+        print("source directory : %s" % os.path.abspath(args.src))
+        print("requests         : %d" % args.requests)
+        print("first request    : %.1f ms" % (1000 * result["first"]))
+        print("median request   : %.1f ms" % (1000 * result["median"]))
+        print("total            : %.1f ms" % (1000 * result["total"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+compares the creation of many secrets as separate Custom::Secret resources, to the creation
+of the same secrets as a single Custom::SecretSet, against a local AWS stand-in with an injected
+latency per API call.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+
+def request(aws, resource_type, properties):
+    return {
+        "RequestType": "Create",
+        "ResponseURL": aws.response_url,
+        "StackId": "arn:aws:cloudformation:eu-central-1:123456789012:stack/benchmark/guid",
+        "RequestId": str(uuid.uuid4()),
+        "ResourceType": resource_type,
+        "LogicalResourceId": "Secret",
+        "ResourceProperties": properties,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="secret set benchmark")
+    parser.add_argument("--secrets", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--writes-per-second", type=float, default=10)
+    args = parser.parse_args()
+
+    with LocalAWS(delay=args.delay) as aws:
+        os.environ.update(aws.environ(), LOG_LEVEL="WARNING")
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+        import secrets
+
+        start = time.perf_counter()
+        for i in range(args.secrets):
+            response = secrets.handler(
+                request(aws, "Custom::Secret", {"Name": "/single/%d" % i}), {}
+            )
+            assert response["Status"] == "SUCCESS", response["Reason"]
+        single = time.perf_counter() - start
+        single_calls = sum(aws.calls.values())
+
+        aws.calls.clear()
+        properties = {
+            "Secrets": [
+                {"Id": "S%d" % i, "Name": "/set/%d" % i} for i in range(args.secrets)
+            ],
+            "WritesPerSecond": args.writes_per_second,
+        }
+        start = time.perf_counter()
+        response = secrets.handler(request(aws, "Custom::SecretSet", properties), {})
+        assert response["Status"] == "SUCCESS", response["Reason"]
+        batched = time.perf_counter() - start
+        batched_calls = sum(aws.calls.values())
+
+    print("secrets            : %d" % args.secrets)
+    print("latency per call   : %.0f ms" % (1000 * args.delay))
+    print("writes per second  : %.1f" % args.writes_per_second)
+    print(
+        "Custom::Secret     : %7.1f ms, %d invocations, %d calls"
+        % (1000 * single, args.secrets, single_calls)
+    )
+    print(
+        "Custom::SecretSet  : %7.1f ms, 1 invocation, %d calls"
+        % (1000 * batched, batched_calls)
+    )
+
+
+if __name__ == "__main__":
+    main()
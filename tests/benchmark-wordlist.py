@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+compares loading a word list for passphrases into a Python list, to mapping the fixed-width word
+list file into memory, each in a fresh interpreter. Without `--wordlist`, a synthetic list of
+7776 words is used.
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, src)
+
+import wordlist  # noqa: E402
+
+PROBE = """
+import json, sys, time
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+import entropy, wordlist
+before = rss()
+start = time.perf_counter()
+if sys.argv[1] == "list":
+    with open(sys.argv[2], encoding="utf8") as f:
+        words = wordlist.read_words(f)
+else:
+    words = wordlist.load(sys.argv[2])
+init = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(1000):
+    "-".join(words[entropy.randbelow(len(words))] for _ in range(6))
+generate = (time.perf_counter() - start) / 1000
+print(json.dumps({"init": init, "generate": generate, "rss": rss() - before}))
+"""
+
+
+def synthetic_words(count):
+    syllables = [c + v for c in "bdfghjklmnprstvz" for v in "aeiou"]
+    words = ("".join(s) for s in itertools.product(syllables, repeat=3))
+    return list(itertools.islice(words, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="word list benchmark")
+    parser.add_argument("--wordlist", help="text word list, such as the EFF large list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        text = args.wordlist
+        if not text:
+            text = os.path.join(directory, "wordlist.txt")
+            with open(text, "w", encoding="utf8") as f:
+                f.write("\n".join(synthetic_words(7776)) + "\n")
+        with open(text, encoding="utf8") as f:
+            words = wordlist.read_words(f)
+        binary = os.path.join(directory, "wordlist.bin")
+        with open(binary, "wb") as f:
+            f.write(wordlist.build(words))
+
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(src))
+        print("words: %d" % len(words))
+        print("| load        | init time | RSS increase | passphrase of 6 words |")
+        print("|-------------|----------:|-------------:|----------------------:|")
+        for mode, path in [("list", text), ("memory map", binary)]:
+            output = subprocess.check_output(
+                [sys.executable, "-c", PROBE, mode.split()[0], path], env=env
+            )
+            result = json.loads(output.decode("utf-8").splitlines()[-1])
+            print(
+                "| %-11s | %6.2f ms | %9.0f KB | %18.1f us |"
+                % (
+                    mode,
+                    1000 * result["init"],
+                    result["rss"] / 1024,
+                    1e6 * result["generate"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+measures creating Custom::Secret resources in parallel against a local AWS stand-in which
+throttles PutParameter, as when CloudFormation creates many resources at once. Each container
+is a fresh interpreter which handles its Create requests one after the other, with a Lambda
+context of a 30 second timeout.
+
+To compare with another revision, check it out in a worktree and pass its source directory:
+
+    git worktree add /tmp/baseline <revision>
+    python tests/benchmark-write-scheduler.py --src /tmp/baseline/src
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_aws import LocalAWS
+
+PROBE = """
+import json, sys, time, uuid
+import secrets
+
+class Context(object):
+    def __init__(self, timeout):
+        self.end = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return int(1000 * (self.end - time.monotonic()))
+
+container, resources, response_url = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+results = []
+for i in range(resources):
+    request = {
+        "RequestType": "Create",
+        "ResponseURL": response_url,
+        "StackId": "arn:aws:cloudformation:eu-central-1:123456789012:stack/benchmark/guid",
+        "RequestId": str(uuid.uuid4()),
+        "ResourceType": "Custom::Secret",
+        "LogicalResourceId": "Secret",
+        "ResourceProperties": {"Name": "/benchmark/%s/%d" % (container, i)},
+    }
+    start = time.perf_counter()
+    response = secrets.handler(request, Context(30))
+    results.append((response["Status"], time.perf_counter() - start))
+print(json.dumps(results))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="throttled parameter write benchmark")
+    parser.add_argument(
+        "--src", default=os.path.join(os.path.dirname(__file__), "..", "src")
+    )
+    parser.add_argument("--containers", type=int, default=8)
+    parser.add_argument("--resources", type=int, default=5)
+    parser.add_argument("--put-parameter-tps", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with LocalAWS(delay=args.delay, put_parameter_tps=args.put_parameter_tps) as aws:
+        env = dict(os.environ, LOG_LEVEL="ERROR", **aws.environ())
+        env["PYTHONPATH"] = os.path.abspath(args.src)
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    PROBE,
+                    str(c),
+                    str(args.resources),
+                    aws.response_url,
+                ],
+                env=env,
+                stdout=subprocess.PIPE,
+            )
+            for c in range(args.containers)
+        ]
+        results = []
+        for p in processes:
+            output, _ = p.communicate()
+            results.extend(json.loads(output.decode("utf-8").splitlines()[-1]))
+        elapsed = time.perf_counter() - start
+        calls = dict(aws.calls)
+        stored = len(aws.parameters)
+
+    durations = sorted(d for _, d in results)
+    failed = sum(1 for status, _ in results if status != "SUCCESS")
+    print("source directory  : %s" % os.path.abspath(args.src))
+    print("PutParameter tps  : %d" % args.put_parameter_tps)
+    print("resources         : %d in %d containers" % (len(results), args.containers))
+    print("failed            : %d" % failed)
+    print("parameters stored : %d" % stored)
+    print("total time        : %.1f s" % elapsed)
+    print("slowest resource  : %.1f s" % durations[-1])
+    print("calls             : %s" % json.dumps(calls, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from collections import OrderedDict
+
+import pytest
+
+import aws_clients
+
+
+@pytest.fixture(autouse=True)
+def shared_clients(monkeypatch):
+    """
+    gives each test its own shared clients, so that the calls of a test, or of the writes it
+    left running, are never recorded by another test.
+    """
+    monkeypatch.setattr(aws_clients, "_clients", OrderedDict())
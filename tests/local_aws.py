@@ -0,0 +1,237 @@
+"""
+a minimal, in-process stand-in for the SSM, KMS and STS operations used by the providers.
+
+It is used by the benchmark scripts, to measure the provider against a predictable
+endpoint with optional injected latency and throttling. Point boto3 at it through
+the environment returned by `LocalAWS.environ()`, which sets AWS_ENDPOINT_URL: botocore
+ignores it before 1.31, the minimum of the boto3 version in the Pipfile.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from base64 import b64decode, b64encode
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ACCOUNT_ID = "123456789012"
+REGION = "eu-central-1"
+
+
+class ServiceError(Exception):
+    def __init__(self, code, message, status=400):
+        super(ServiceError, self).__init__(message)
+        self.code = code
+        self.status = status
+
+
+class LocalAWS(object):
+    def __init__(self, delay=0.0, put_parameter_tps=None):
+        """
+        `delay` seconds are added to every API call, and PutParameter calls exceeding
+        `put_parameter_tps` in a one second window fail with a ThrottlingException.
+        """
+        self.delay = delay
+        self.put_parameter_tps = put_parameter_tps
+        self.parameters = {}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self._puts = deque()
+        self._server = None
+
+    @property
+    def endpoint_url(self):
+        return "http://127.0.0.1:%d" % self._server.server_address[1]
+
+    @property
+    def response_url(self):
+        return "%s/response" % self.endpoint_url
+
+    def environ(self):
+        return {
+            "AWS_ENDPOINT_URL": self.endpoint_url,
+            "AWS_ACCESS_KEY_ID": "AKIALOCALSTANDIN",
+            "AWS_SECRET_ACCESS_KEY": "local-stand-in",
+            "AWS_DEFAULT_REGION": REGION,
+            "AWS_REGION": REGION,
+        }
+
+    def start(self):
+        local_aws = self
+
+        class Handler(_RequestHandler):
+            aws = local_aws
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def throttle(self):
+        if self.put_parameter_tps is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            while self._puts and now - self._puts[0] > 1.0:
+                self._puts.popleft()
+            if len(self._puts) >= self.put_parameter_tps:
+                raise ServiceError("ThrottlingException", "Rate exceeded")
+            self._puts.append(now)
+
+    @staticmethod
+    def normalize(name):
+        # hierarchical names are stored with a leading slash, which is optional in requests
+        return name if "/" not in name or name[0] == "/" else "/" + name
+
+    def arn(self, name):
+        return "arn:aws:ssm:%s:%s:parameter/%s" % (REGION, ACCOUNT_ID, name.lstrip("/"))
+
+    def parameter(self, name):
+        name = self.normalize(name)
+        p = self.parameters.get(name)
+        if p is None:
+            raise ServiceError("ParameterNotFound", "Parameter %s not found." % name)
+        return {
+            "Name": name,
+            "Type": p["Type"],
+            "Value": p["Value"],
+            "Version": p["Version"],
+            "ARN": self.arn(name),
+        }
+
+    def PutParameter(self, args):
+        self.throttle()
+        with self.lock:
+            name = self.normalize(args["Name"])
+            current = self.parameters.get(name)
+            if current is not None and not args.get("Overwrite", False):
+                raise ServiceError(
+                    "ParameterAlreadyExists", "The parameter already exists."
+                )
+            version = current["Version"] + 1 if current else 1
+            self.parameters[name] = {
+                "Value": args["Value"],
+                "Type": args.get("Type", "String"),
+                "Description": args.get("Description", ""),
+                "Version": version,
+            }
+            return {"Version": version, "Tier": "Standard"}
+
+    def GetParameter(self, args):
+        with self.lock:
+            return {"Parameter": self.parameter(args["Name"])}
+
+    def GetParameters(self, args):
+        with self.lock:
+            names = args["Names"]
+            found = [n for n in names if self.normalize(n) in self.parameters]
+            return {
+                "Parameters": [self.parameter(n) for n in found],
+                "InvalidParameters": [n for n in names if n not in found],
+            }
+
+    def DeleteParameter(self, args):
+        with self.lock:
+            if self.parameters.pop(self.normalize(args["Name"]), None) is None:
+                raise ServiceError(
+                    "ParameterNotFound", "Parameter %s not found." % args["Name"]
+                )
+            return {}
+
+    def DeleteParameters(self, args):
+        with self.lock:
+            names = args["Names"]
+            deleted = [n for n in names if self.parameters.pop(self.normalize(n), None)]
+            return {
+                "DeletedParameters": deleted,
+                "InvalidParameters": [n for n in names if n not in deleted],
+            }
+
+    def Encrypt(self, args):
+        blob = b"local-kms:" + b64decode(args["Plaintext"])
+        return {
+            "CiphertextBlob": b64encode(blob).decode("ascii"),
+            "KeyId": args["KeyId"],
+        }
+
+    def GenerateDataKey(self, args):
+        key = os.urandom(32)
+        return {
+            "Plaintext": b64encode(key).decode("ascii"),
+            "CiphertextBlob": b64encode(b"local-kms:" + key).decode("ascii"),
+            "KeyId": args["KeyId"],
+        }
+
+    def Decrypt(self, args):
+        blob = b64decode(args["CiphertextBlob"])
+        if not blob.startswith(b"local-kms:"):
+            raise ServiceError("InvalidCiphertextException", "")
+        plaintext = blob[len(b"local-kms:") :]
+        return {"Plaintext": b64encode(plaintext).decode("ascii"), "KeyId": "local"}
+
+    def GetCallerIdentity(self, args):
+        return (
+            '<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">'
+            "<GetCallerIdentityResult><Arn>arn:aws:iam::%s:user/local</Arn>"
+            "<UserId>LOCAL</UserId><Account>%s</Account></GetCallerIdentityResult>"
+            "<ResponseMetadata><RequestId>%s</RequestId></ResponseMetadata>"
+            "</GetCallerIdentityResponse>" % (ACCOUNT_ID, ACCOUNT_ID, uuid.uuid4())
+        )
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    aws = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        # the CloudFormation response url
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.aws.calls["SendResponse"] += 1
+        self.reply(200, "", "text/plain")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        target = self.headers.get("X-Amz-Target")
+        if target:
+            operation = target.split(".", 1)[1]
+            args = json.loads(body or b"{}")
+        else:
+            query = parse_qs(body.decode("utf-8"))
+            operation = query["Action"][0]
+            args = query
+
+        self.aws.calls[operation] += 1
+        if self.aws.delay:
+            time.sleep(self.aws.delay)
+
+        try:
+            result = getattr(self.aws, operation)(args)
+            if isinstance(result, str):
+                self.reply(200, result, "text/xml")
+            else:
+                self.reply(200, json.dumps(result), "application/x-amz-json-1.1")
+        except ServiceError as e:
+            error = {"__type": e.code, "message": str(e)}
+            self.reply(e.status, json.dumps(error), "application/x-amz-json-1.1")
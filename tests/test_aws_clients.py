@@ -0,0 +1,59 @@
+import aws_clients
+
+
+def test_shared_clients():
+    assert aws_clients.client("ssm", "eu-west-1") is aws_clients.client(
+        "ssm", "eu-west-1"
+    )
+    assert aws_clients.client("ssm", "eu-west-1") is not aws_clients.client(
+        "ssm", "us-east-1"
+    )
+    assert aws_clients.client("ssm", "eu-west-1") is not aws_clients.client(
+        "kms", "eu-west-1"
+    )
+    assert aws_clients.client("ssm", "eu-west-1") is not aws_clients.client(
+        "ssm",
+        "eu-west-1",
+        credentials={
+            "aws_access_key_id": "AKIAEXAMPLE",
+            "aws_secret_access_key": "secret",
+        },
+    )
+
+    client = aws_clients.client("ssm", "eu-west-1")
+    assert client.meta.config.max_pool_connections == 10
+    assert client.meta.config.tcp_keepalive
+
+    no_retries = aws_clients.client("ssm", "eu-west-1", retries=False)
+    assert no_retries is not client
+    assert no_retries.meta.config.retries["total_max_attempts"] == 1
+    assert no_retries.meta.config.max_pool_connections == 10
+
+
+def test_default_region():
+    region = aws_clients.session().region_name
+    if region:
+        assert aws_clients.client("ssm") is aws_clients.client("ssm", region)
+
+
+def test_least_recently_used_eviction():
+    max_clients = aws_clients.max_clients
+    aws_clients.max_clients = 2
+    try:
+        eu_west_1 = aws_clients.client("ssm", "eu-west-1")
+        us_east_1 = aws_clients.client("ssm", "us-east-1")
+        assert aws_clients.client("ssm", "eu-west-1") is eu_west_1
+
+        aws_clients.client("ssm", "ap-southeast-2")
+        assert len(aws_clients._clients) == 2
+        assert aws_clients.client("ssm", "eu-west-1") is eu_west_1
+        assert aws_clients.client("ssm", "us-east-1") is not us_east_1
+    finally:
+        aws_clients.max_clients = max_clients
+
+
+def test_shared_executor():
+    executor = aws_clients.executor()
+    assert aws_clients.executor() is executor
+    assert executor._max_workers == aws_clients.config.max_pool_connections
+    assert executor.submit(lambda: 42).result() == 42
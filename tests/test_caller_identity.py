@@ -0,0 +1,66 @@
+import caller_identity
+
+
+class Context(object):
+    def __init__(self, invoked_function_arn):
+        self.invoked_function_arn = invoked_function_arn
+
+
+def test_from_arn():
+    test_set = {
+        "arn:aws:lambda:eu-central-1:111111111114:function:binxio-cfn-secret-provider": (
+            "eu-central-1",
+            "111111111114",
+        ),
+        "arn:aws:lambda:eu-west-1:111111111114:function:provider:live": (
+            "eu-west-1",
+            "111111111114",
+        ),
+        "arn:aws:sns:us-east-1:111111111114:cfn-secret-provider": (
+            "us-east-1",
+            "111111111114",
+        ),
+        "arn:aws-cn:lambda:cn-north-1:111111111114:function:provider": (
+            "cn-north-1",
+            "111111111114",
+        ),
+        "arn:aws:iam::111111111114:role/provider": None,
+        "binxio-cfn-secret-provider": None,
+        None: None,
+    }
+    for arn, expect in test_set.items():
+        assert expect == caller_identity.from_arn(arn), arn
+
+
+def test_resolve_from_context():
+    caller_identity._identity.clear()
+    try:
+        context = Context(
+            "arn:aws:lambda:eu-west-1:111111111114:function:binxio-cfn-secret-provider"
+        )
+        caller_identity.resolve(
+            {"ServiceToken": "arn:aws:lambda:us-east-1:222222222224:function:other"},
+            context,
+        )
+        assert caller_identity.account_id() == "111111111114"
+        assert caller_identity.region() == "eu-west-1"
+    finally:
+        caller_identity._identity.clear()
+
+
+def test_resolve_from_service_token():
+    caller_identity._identity.clear()
+    try:
+        request = {
+            "ServiceToken": "arn:aws:lambda:us-east-1:222222222224:function:provider"
+        }
+        caller_identity.resolve(request, {})
+        assert caller_identity.account_id() == "222222222224"
+        assert caller_identity.region() == "us-east-1"
+
+        # the first resolved identity is kept
+        request["ServiceToken"] = "arn:aws:lambda:eu-west-1:111111111114:function:x"
+        caller_identity.resolve(request, {})
+        assert caller_identity.account_id() == "222222222224"
+    finally:
+        caller_identity._identity.clear()
@@ -150,6 +150,29 @@ def test_type_convert():
     assert isinstance(r.get("RefreshOnUpdate"), bool)
 
 
+def test_reuse_domain_parameters():
+    request = Request("Create", "abc")
+    request["ResourceProperties"]["ReuseDomainParameters"] = "true"
+    r = DSAKeyProvider()
+    r.set_request(request, {})
+    assert r.is_valid_request()
+    assert r.get("ReuseDomainParameters") is True
+
+    public_keys = []
+    for _ in range(2):
+        public_keys.append(r.create_key().public)
+
+    numbers = [k.public_numbers() for k in public_keys]
+    assert numbers[0].parameter_numbers == numbers[1].parameter_numbers
+    assert numbers[0].y != numbers[1].y
+
+    request["ResourceProperties"]["ReuseDomainParameters"] = False
+    r.set_request(request, {})
+    assert r.is_valid_request()
+    public_key = r.create_key().public
+    assert public_key.public_numbers().parameter_numbers != numbers[0].parameter_numbers
+
+
 def test_request_duplicate_create():
     # prrequest duplicate create
     name = "/test/parameter-%s" % uuid.uuid4()
@@ -4,6 +4,8 @@ import uuid
 from base64 import b64encode, b64decode
 from cfn_random_bytes_provider import RandomBytesProvider
 from secrets import handler
+import caller_identity
+from api_calls import ApiCalls
 
 kms = boto3.client("kms")
 
@@ -300,6 +302,37 @@ def test_unchanged_physical_resource_id():
     assert response["Status"] == "SUCCESS", response["Reason"]
 
 
+def test_unchanged_update_skips_the_write(monkeypatch):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    arn = "arn:aws:ssm:eu-central-1:123456789012:parameter/test/bytes"
+    request = Request("Update", "/test/bytes", arn)
+    request["OldResourceProperties"] = {"Name": "/test/bytes", "Length": 8}
+    request["ResourceProperties"]["Length"] = 16
+    provider = RandomBytesProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+
+    parameter = {"Name": "/test/bytes", "Value": "c2VjcmV0", "Version": 3}
+    ssm = {
+        "GetParameter": lambda params: {"Parameter": parameter},
+        "PutParameter": lambda params: {"Version": 4},
+    }
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert c.operations == ["GetParameter"]
+    assert provider.response["Data"]["Version"] == 3
+
+    request["ResourceProperties"]["Description"] = "new"
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert c.operations == ["GetParameter", "PutParameter"]
+    assert provider.response["Data"]["Version"] == 4
+
+
 class Request(dict):
     def __init__(self, request_type, name, physical_resource_id=None):
         self.update(
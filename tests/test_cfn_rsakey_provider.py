@@ -2,9 +2,12 @@ import sys
 import uuid
 import boto3
 import hashlib
-from cfn_rsakey_provider import RSAKeyProvider
+import caller_identity
+from api_calls import ApiCalls, client_error
+from cfn_rsakey_provider import RSAKeyProvider, generate_private_key
 from secrets import handler
 
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.serialization import load_pem_public_key
 from cryptography.hazmat.backends import default_backend
 
@@ -333,6 +336,119 @@ def test_unchanged_physical_resource_id():
     assert response["Status"] == "SUCCESS", response["Reason"]
 
 
+def test_store_public_key():
+    ssm = boto3.client("ssm")
+    name = "/test/parameter-%s" % uuid.uuid4()
+    request = Request("Create", name)
+    request["ResourceProperties"]["StorePublicKey"] = True
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    physical_resource_id = response["PhysicalResourceId"]
+    data = response["Data"]
+
+    parameter = ssm.get_parameter(Name=name + ".pub")["Parameter"]
+    assert parameter["Type"] == "String"
+
+    # an update without changes returns the stored attributes, without writing the key
+    request = Request("Update", name, physical_resource_id)
+    request["ResourceProperties"]["StorePublicKey"] = True
+    request["OldResourceProperties"] = {"Name": name, "StorePublicKey": "true"}
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    assert response["Data"] == data
+    version = ssm.get_parameter(Name=name)["Parameter"]["Version"]
+    assert version == 1
+
+    # a changed description rewrites the key
+    request["ResourceProperties"]["Description"] = "a changed description"
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    assert response["Data"]["PublicKey"] == data["PublicKey"]
+    assert response["Data"]["Version"] == 2
+
+    request = Request("Delete", name, physical_resource_id)
+    request["ResourceProperties"]["StorePublicKey"] = True
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    response = ssm.get_parameters(Names=[name, name + ".pub"])
+    assert len(response["InvalidParameters"]) == 2
+
+
+def stored_public_key_update_request(monkeypatch, **properties):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    arn = "arn:aws:ssm:eu-central-1:123456789012:parameter/test/key"
+    request = Request("Update", "/test/key", arn)
+    request["ResourceProperties"].update(properties)
+    request["OldResourceProperties"] = {"Name": "/test/key", "StorePublicKey": "true"}
+    return request
+
+
+def test_unchanged_key_compares_with_defaults(monkeypatch):
+    provider = RSAKeyProvider()
+    request = stored_public_key_update_request(monkeypatch, StorePublicKey=True)
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    assert provider.is_unchanged_key
+
+    request["ResourceProperties"]["KeyAlias"] = "alias/aws/ssm"
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    assert provider.is_unchanged_key
+
+    # explicitly setting a property which was left to its default is a change
+    request["ResourceProperties"]["KeyAlias"] = "alias/new"
+    request["ResourceProperties"]["Description"] = "new"
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    assert not provider.is_unchanged_key
+
+
+def test_update_deletes_public_key_no_longer_stored(monkeypatch):
+    key = generate_private_key(2048, 65537).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    ssm = {
+        "GetParameter": lambda params: {
+            "Parameter": {"Name": "/test/key", "Value": key.decode("ascii")}
+        },
+        "PutParameter": lambda params: {"Version": 2},
+        "DeleteParameter": lambda params: {},
+    }
+    provider = RSAKeyProvider()
+    provider.set_request(stored_public_key_update_request(monkeypatch), {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert c.operations == ["GetParameter", "PutParameter", "DeleteParameter"]
+    assert c.calls[-1][1] == {"Name": "/test/key.pub"}
+
+
+def test_failed_public_key_write_removes_the_new_key():
+    def put_parameter(params):
+        if params["Name"].endswith(".pub"):
+            raise client_error("ParameterAlreadyExists", "PutParameter")
+        return {"Version": 1}
+
+    ssm = {"PutParameter": put_parameter, "DeleteParameter": lambda params: {}}
+    request = Request("Create", "/test/key")
+    request["ResourceProperties"]["StorePublicKey"] = True
+    provider = RSAKeyProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.create()
+    assert provider.status == "FAILED"
+    assert provider.physical_resource_id == "could-not-create"
+    assert c.operations == ["PutParameter", "PutParameter", "DeleteParameter"]
+    # the public key of another owner is not overwritten
+    assert not c.calls[1][1]["Overwrite"]
+    assert c.calls[2][1] == {"Name": "/test/key"}
+
+
 class Request(dict):
     def __init__(self, request_type, name, physical_resource_id=str(uuid.uuid4())):
         self.update(
@@ -1,10 +1,17 @@
 import boto3
 import hashlib
+import json
+import os
 import uuid
 from base64 import b64encode, b64decode
 from cfn_secret_provider import SecretProvider
 from secrets import handler
 from collections import Counter
+import caller_identity
+import decrypt_cache
+import envelope
+import wordlist
+from api_calls import ApiCalls
 
 kms = boto3.client("kms")
 
@@ -306,6 +313,55 @@ def test_create_with_content():
     assert response["Status"] == "SUCCESS", response["Reason"]
 
 
+def test_create_with_content_template():
+    name = "/test/6-parameter-%s" % uuid.uuid4()
+    request = Request("Create", name)
+    request["ResourceProperties"]["ReturnSecret"] = True
+    request["ResourceProperties"]["Content"] = {
+        "username": "admin",
+        "password": {"Password": {"Length": "16"}},
+        "salt": {"RandomBytes": {}},
+        "dsn": {"user": {"Field": "username"}, "password": {"Field": "password"}},
+    }
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    physical_resource_id = response["PhysicalResourceId"]
+
+    secret = json.loads(response["Data"]["Secret"])
+    assert secret["username"] == "admin"
+    assert len(secret["password"]) == 16
+    assert len(b64decode(secret["salt"])) == 8
+    assert secret["dsn"] == {"user": "admin", "password": secret["password"]}
+    assert (
+        response["Data"]["Hash"]
+        == hashlib.md5(response["Data"]["Secret"].encode("utf8")).hexdigest()
+    )
+
+    # update without refresh keeps the secret
+    request = Request("Update", name, physical_resource_id)
+    request["ResourceProperties"]["ReturnSecret"] = True
+    request["ResourceProperties"]["Content"] = {"password": {"Password": {}}}
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    assert json.loads(response["Data"]["Secret"]) == secret
+
+    request = Request("Delete", name, physical_resource_id)
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+
+
+def test_invalid_content_template():
+    request = Request("Create", "abc")
+    request["ResourceProperties"]["Content"] = {"password": {"Field": "secret"}}
+    provider = SecretProvider()
+    provider.set_request(request, {})
+    assert not provider.is_valid_request()
+    assert (
+        provider.reason
+        == "password: the Field secret should be a top-level field which does not refer to another field"
+    )
+
+
 def get_kms_key():
     for response in kms.get_paginator("list_aliases").paginate():
         key_id = next(
@@ -482,6 +538,168 @@ def test_generate_password():
     assert len(password) == 30
 
 
+def test_generate_passphrase(tmp_path, monkeypatch):
+    words = ["correct", "horse", "battery", "staple"]
+    path = tmp_path / "wordlist.bin"
+    path.write_bytes(wordlist.build(words))
+    monkeypatch.setattr(wordlist, "default_path", str(path))
+
+    request = Request("Create", "abc")
+    request["ResourceProperties"]["PassphraseWords"] = "6"
+    provider = SecretProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    passphrase = provider.get_content().split("-")
+    assert len(passphrase) == 6
+    assert set(passphrase) <= set(words)
+
+    request["ResourceProperties"]["Separator"] = " "
+    assert len(provider.get_content().split(" ")) == 6
+
+    monkeypatch.setattr(wordlist, "default_path", str(tmp_path / "missing.bin"))
+    provider.set_request(request, {})
+    assert not provider.is_valid_request()
+    assert provider.reason.startswith("failed to load the word list for passphrases")
+
+
+def unchanged_update_request(**properties):
+    arn = "arn:aws:ssm:eu-central-1:123456789012:parameter/test/secret"
+    request = Request("Update", "/test/secret", arn)
+    request["ResourceProperties"].update(properties)
+    request["OldResourceProperties"] = dict(request["ResourceProperties"])
+    return request
+
+
+def test_unchanged_update_skips_the_write(monkeypatch):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    request = unchanged_update_request(Description="a secret")
+    provider = SecretProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+
+    parameter = {"Name": "/test/secret", "Value": "secret", "Version": 3}
+    ssm = {
+        "GetParameter": lambda params: {"Parameter": parameter},
+        "PutParameter": lambda params: {"Version": 4},
+    }
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert c.operations == ["GetParameter"]
+    assert provider.response["Data"]["Version"] == 3
+    assert provider.response["Data"]["Hash"] == hashlib.md5(b"secret").hexdigest()
+
+    # a new description or key is written
+    for name, value in [("Description", "new"), ("KeyAlias", "alias/new")]:
+        request = unchanged_update_request(Description="a secret")
+        request["ResourceProperties"][name] = value
+        provider.set_request(request, {})
+        assert provider.is_valid_request()
+        with ApiCalls(provider.ssm, ssm) as c:
+            provider.update()
+        assert provider.status == "SUCCESS", provider.reason
+        assert c.operations == ["GetParameter", "PutParameter"]
+        assert c.calls[1][1]["Value"] == "secret"
+        assert provider.response["Data"]["Version"] == 4
+
+
+def test_unchanged_encrypted_content_skips_the_write(monkeypatch):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    decrypt_cache.cache.clear()
+    request = unchanged_update_request(
+        EncryptedContent=b64encode(b"ciphertext").decode("ascii")
+    )
+    provider = SecretProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+
+    parameter = {"Name": "/test/secret", "Value": "secret", "Version": 3}
+    ssm = {
+        "GetParameter": lambda params: {"Parameter": parameter},
+        "PutParameter": lambda params: {"Version": 4},
+    }
+    kms = {"Decrypt": lambda params: {"Plaintext": b"secret"}}
+    # an unchanged ciphertext is neither decrypted nor written
+    with ApiCalls(provider.ssm, ssm) as s, ApiCalls(provider.kms, kms) as k:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert s.operations == ["GetParameter"]
+    assert k.operations == []
+    assert provider.response["Data"]["Version"] == 3
+
+    # a new ciphertext of the stored value is decrypted once, and not written
+    request["ResourceProperties"]["EncryptedContent"] = b64encode(b"other").decode()
+    for _ in range(2):
+        provider.set_request(request, {})
+        assert provider.is_valid_request()
+        with ApiCalls(provider.ssm, ssm) as s, ApiCalls(provider.kms, kms) as k:
+            provider.update()
+        assert provider.status == "SUCCESS", provider.reason
+        assert s.operations == ["GetParameter"]
+        assert provider.response["Data"]["Version"] == 3
+    assert k.operations == []
+
+    # a new secret is written
+    request["ResourceProperties"]["EncryptedContent"] = b64encode(b"new").decode()
+    kms = {"Decrypt": lambda params: {"Plaintext": b"new secret"}}
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as s, ApiCalls(provider.kms, kms) as k:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert k.operations == ["Decrypt"]
+    assert s.operations == ["GetParameter", "PutParameter"]
+    assert provider.response["Data"]["Version"] == 4
+    decrypt_cache.cache.clear()
+
+
+def test_create_with_envelope_encrypted_content(monkeypatch):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    decrypt_cache.cache.clear()
+    data_key = os.urandom(32)
+    kms = {"Decrypt": lambda params: {"Plaintext": data_key}}
+    ssm = {"PutParameter": lambda params: {"Version": 1}}
+    kms_operations = []
+    # envelopes of the same data key are decrypted with a single KMS call
+    for i, secret in enumerate([b"first secret", b"second secret" * 400]):
+        request = Request("Create", "/test/envelope/%d" % i)
+        blob = envelope.seal(data_key, b"encrypted data key", secret)
+        request["ResourceProperties"]["EncryptedContent"] = b64encode(blob).decode()
+        provider = SecretProvider()
+        provider.set_request(request, {})
+        assert provider.is_valid_request()
+        with ApiCalls(provider.ssm, ssm) as s, ApiCalls(provider.kms, kms) as k:
+            provider.create()
+        assert provider.status == "SUCCESS", provider.reason
+        assert s.calls[-1][1]["Value"] == secret.decode("utf8")
+        kms_operations.extend(k.operations)
+    assert kms_operations == ["Decrypt"]
+    # a secret larger than a standard parameter is stored in the advanced tier
+    assert s.calls[-1][1]["Tier"] == "Intelligent-Tiering"
+
+    blob = bytearray(blob)
+    blob[-1] ^= 1
+    request["ResourceProperties"]["EncryptedContent"] = b64encode(blob).decode()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as s, ApiCalls(provider.kms, kms):
+        provider.create()
+    assert provider.status == "FAILED"
+    assert provider.reason == "the envelope could not be decrypted"
+    assert s.operations == []
+
+    request["ResourceProperties"]["EncryptedContent"] = b64encode(
+        envelope.magic + b"\0"
+    ).decode()
+    provider.set_request(request, {})
+    assert not provider.is_valid_request()
+    assert provider.reason.startswith("EncryptedContent is an invalid envelope")
+    decrypt_cache.cache.clear()
+
+
 class Request(dict):
     def __init__(self, request_type, name, physical_resource_id=None):
         self.update(
@@ -0,0 +1,215 @@
+import uuid
+import hashlib
+
+import boto3
+
+import caller_identity
+from api_calls import ApiCalls
+from cfn_secret_set_provider import SecretSetProvider
+from secrets import handler
+
+
+def test_defaults():
+    request = Request("Create", ["/test/a", "/test/b"])
+    r = SecretSetProvider()
+    r.set_request(request, {})
+    assert r.is_valid_request()
+    assert r.get("KeyAlias") == "alias/aws/ssm"
+    assert r.get("WritesPerSecond") == 10
+    for secret in r.get("Secrets"):
+        assert secret["Description"] == ""
+        assert len(r.secret_password_policy(secret).generate()) == 30
+
+
+def test_type_convert():
+    request = Request("Create", ["/test/a"])
+    request["ResourceProperties"]["Length"] = "20"
+    request["ResourceProperties"]["WritesPerSecond"] = "2.5"
+    request["ResourceProperties"]["Secrets"][0]["Length"] = "10"
+    request["ResourceProperties"]["Secrets"][0]["Required"] = [
+        {"Count": "2", "Alphabet": "0123456789"}
+    ]
+    r = SecretSetProvider()
+    r.set_request(request, {})
+    assert r.is_valid_request()
+    assert r.get("Length") == 20
+    assert r.get("WritesPerSecond") == 2.5
+    password = r.secret_password_policy(r.get("Secrets")[0]).generate()
+    assert len(password) == 10
+    assert sum(c in "0123456789" for c in password) >= 2
+
+
+def test_invalid_sets():
+    request = Request("Create", ["/test/a", "/test/a"])
+    r = SecretSetProvider()
+    r.set_request(request, {})
+    assert not r.is_valid_request()
+    assert r.reason == "duplicate Name in Secrets: /test/a"
+
+    request = Request("Create", ["/test/a"])
+    request["ResourceProperties"]["Secrets"][0]["Length"] = 1
+    request["ResourceProperties"]["Required"] = [{"Count": 2, "Alphabet": "abc"}]
+    r.set_request(request, {})
+    assert not r.is_valid_request()
+    assert (
+        r.reason
+        == "secret S0: the length should at least exceed the 2 required characters"
+    )
+
+    request = Request("Create", ["/test/a"])
+    request["ResourceProperties"]["Secrets"][0]["Id"] = "not-alphanumeric"
+    r.set_request(request, {})
+    assert not r.is_valid_request()
+
+
+def test_create_update_delete():
+    ssm = boto3.client("ssm")
+    prefix = "/test/secret-set-%s" % uuid.uuid4()
+    names = ["%s/%d" % (prefix, i) for i in range(12)]
+    request = Request("Create", names)
+    request["ResourceProperties"]["ReturnSecret"] = True
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    physical_resource_id = response["PhysicalResourceId"]
+    assert physical_resource_id.startswith("secret-set-")
+
+    for i, name in enumerate(names):
+        secret = response["Data"]["S%d.Secret" % i]
+        assert len(secret) == 30
+        assert response["Data"]["S%d.ParameterName" % i] == name
+        assert response["Data"]["S%d.Version" % i] == 1
+        assert (
+            response["Data"]["S%d.Hash" % i]
+            == hashlib.md5(secret.encode("utf8")).hexdigest()
+        )
+    secrets = {k: v for k, v in response["Data"].items() if k.endswith(".Secret")}
+
+    # update keeps the values, adds and removes secrets
+    old_properties = request["ResourceProperties"]
+    request = Request("Update", names[1:] + ["%s/new" % prefix], physical_resource_id)
+    request["OldResourceProperties"] = old_properties
+    request["ResourceProperties"]["ReturnSecret"] = True
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    assert response["PhysicalResourceId"] == physical_resource_id
+    for i in range(11):
+        assert response["Data"]["S%d.Secret" % i] == secrets["S%d.Secret" % (i + 1)]
+        assert response["Data"]["S%d.Version" % i] == 1
+    assert response["Data"]["S11.Version"] == 1
+
+    invalid = ssm.get_parameters(Names=names[:1])["InvalidParameters"]
+    assert invalid == names[:1]
+
+    request = Request("Delete", names[1:] + ["%s/new" % prefix], physical_resource_id)
+    response = handler(request, {})
+    assert response["Status"] == "SUCCESS", response["Reason"]
+    assert len(ssm.get_parameters(Names=names[1:])["InvalidParameters"]) == 11
+
+
+def test_create_existing_rolls_back():
+    ssm = boto3.client("ssm")
+    prefix = "/test/secret-set-%s" % uuid.uuid4()
+    existing = "%s/existing" % prefix
+    ssm.put_parameter(Name=existing, Value="secret", Type="SecureString")
+
+    request = Request("Create", ["%s/new" % prefix, existing])
+    response = handler(request, {})
+    assert response["Status"] == "FAILED", response["Reason"]
+    assert response["PhysicalResourceId"] == "could-not-create"
+    assert response["Reason"].startswith("failed to write 1 of 2 secrets")
+    assert ssm.get_parameters(Names=["%s/new" % prefix])["InvalidParameters"]
+
+    ssm.delete_parameter(Name=existing)
+
+
+def test_update_writes_changed_secrets_only(monkeypatch):
+    monkeypatch.setitem(caller_identity._identity, "region", "eu-central-1")
+    monkeypatch.setitem(caller_identity._identity, "account_id", "123456789012")
+    request = Request("Update", ["/test/a", "/test/b", "/test/c"], "secret-set-1")
+    request["OldResourceProperties"] = Request("Create", ["/test/a", "/test/b"])[
+        "ResourceProperties"
+    ]
+    request["ResourceProperties"]["Secrets"][1]["Description"] = "changed"
+    provider = SecretSetProvider()
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+
+    ssm = {
+        "GetParameters": lambda params: {
+            "Parameters": [
+                {"Name": n, "Value": "value of " + n, "Version": 3}
+                for n in params["Names"]
+            ],
+            "InvalidParameters": [],
+        },
+        "PutParameter": lambda params: {"Version": 4 if params["Overwrite"] else 1},
+        "DeleteParameters": lambda params: {},
+    }
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    # the unchanged secret is not written, and keeps its version
+    assert sorted(p["Name"] for o, p in c.calls if o == "PutParameter") == [
+        "/test/b",
+        "/test/c",
+    ]
+    data = provider.response["Data"]
+    assert [data["S%d.Version" % i] for i in range(3)] == [3, 4, 1]
+
+    # a changed KeyAlias writes all secrets
+    request["ResourceProperties"]["KeyAlias"] = "alias/new"
+    provider.set_request(request, {})
+    assert provider.is_valid_request()
+    with ApiCalls(provider.ssm, ssm) as c:
+        provider.update()
+    assert provider.status == "SUCCESS", provider.reason
+    assert c.operations.count("PutParameter") == 3
+
+
+class Context(object):
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining
+
+
+def test_writes_stop_at_the_deadline():
+    request = Request("Create", ["/test/a", "/test/b", "/test/c"])
+    request["ResourceProperties"]["WritesPerSecond"] = 1
+    provider = SecretSetProvider()
+    # half a second left for the writes, after the time reserved to report
+    provider.set_request(request, Context(5500))
+    assert provider.is_valid_request()
+
+    writes = [(secret, "value", False) for secret in provider.get("Secrets")]
+    ssm = {"PutParameter": lambda params: {"Version": 1}}
+    with ApiCalls(provider.ssm, ssm) as c:
+        versions, errors = provider.put_secrets(writes)
+    assert c.operations == ["PutParameter"]
+    assert len(versions) == 1
+    assert len(errors) == 2
+    assert all(
+        e.response["Error"]["Code"] == "ThrottlingException" for e in errors.values()
+    )
+
+
+class Request(dict):
+    def __init__(self, request_type, names, physical_resource_id=None):
+        self.update(
+            {
+                "RequestType": request_type,
+                "ResponseURL": "https://httpbin.org/put",
+                "StackId": "arn:aws:cloudformation:us-west-2:EXAMPLE/stack-name/guid",
+                "RequestId": "request-%s" % uuid.uuid4(),
+                "ResourceType": "Custom::SecretSet",
+                "LogicalResourceId": "MySecrets",
+                "ResourceProperties": {
+                    "Secrets": [
+                        {"Id": "S%d" % i, "Name": name} for i, name in enumerate(names)
+                    ]
+                },
+            }
+        )
+        if physical_resource_id is not None:
+            self["PhysicalResourceId"] = physical_resource_id
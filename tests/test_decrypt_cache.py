@@ -0,0 +1,67 @@
+import time
+
+from decrypt_cache import DecryptCache
+
+
+class KMS(object):
+    def __init__(self):
+        self.calls = []
+
+    def decrypt(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"Plaintext": b"plain " + kwargs["CiphertextBlob"]}
+
+
+def test_decrypt_is_cached():
+    cache = DecryptCache()
+    kms = KMS()
+    assert cache.decrypt(kms, b"one") == b"plain one"
+    assert cache.decrypt(kms, b"one") == b"plain one"
+    assert kms.calls == [{"CiphertextBlob": b"one"}]
+
+    assert cache.decrypt(kms, b"two") == b"plain two"
+    assert len(kms.calls) == 2
+
+
+def test_key_context_is_part_of_the_key():
+    cache = DecryptCache()
+    kms = KMS()
+    cache.decrypt(kms, b"one")
+    cache.decrypt(kms, b"one", {"purpose": "test"})
+    cache.decrypt(kms, b"one", {"purpose": "test"})
+    cache.decrypt(kms, b"one", key_id="alias/test")
+    assert kms.calls == [
+        {"CiphertextBlob": b"one"},
+        {"CiphertextBlob": b"one", "EncryptionContext": {"purpose": "test"}},
+        {"CiphertextBlob": b"one", "KeyId": "alias/test"},
+    ]
+
+
+def test_evicted_entries_are_zeroized():
+    cache = DecryptCache(max_entries=2)
+    kms = KMS()
+    cache.decrypt(kms, b"one")
+    plaintext = cache._entries[cache.digest(b"one")][1]
+    cache.decrypt(kms, b"two")
+    cache.decrypt(kms, b"three")
+    assert len(cache._entries) == 2
+    assert plaintext == bytearray(len(b"plain one"))
+
+    # the oldest entry was evicted
+    cache.decrypt(kms, b"one")
+    assert len(kms.calls) == 4
+
+    entries = [e[1] for e in cache._entries.values()]
+    cache.clear()
+    assert all(e == bytearray(len(e)) for e in entries)
+
+
+def test_expired_entries_are_zeroized():
+    cache = DecryptCache(ttl=0.05)
+    kms = KMS()
+    cache.decrypt(kms, b"one")
+    plaintext = cache._entries[cache.digest(b"one")][1]
+    time.sleep(0.06)
+    assert cache.get(cache.digest(b"one")) is None
+    assert plaintext == bytearray(len(b"plain one"))
+    assert not cache._entries
@@ -0,0 +1,128 @@
+import importlib.machinery
+import importlib.util
+import json
+import os
+import threading
+import time
+from base64 import b64decode
+
+import pytest
+
+import envelope
+from api_calls import client_error
+
+
+def load_encrypt_secret():
+    path = os.path.join(os.path.dirname(__file__), "..", "encrypt-secret")
+    loader = importlib.machinery.SourceFileLoader("encrypt_secret", path)
+    spec = importlib.util.spec_from_loader("encrypt_secret", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+encrypt_secret = load_encrypt_secret()
+
+
+class KMS(object):
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.data_keys = []
+
+    def encrypt(self, KeyId, Plaintext):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if Plaintext in self.fail:
+            raise client_error("AccessDeniedException", "Encrypt")
+        return {"CiphertextBlob": KeyId.encode("utf8") + b":" + Plaintext}
+
+    def generate_data_key(self, KeyId, KeySpec):
+        with self.lock:
+            self.data_keys.append(os.urandom(32))
+            key = self.data_keys[-1]
+        return {"Plaintext": key, "CiphertextBlob": KeyId.encode("utf8") + b":" + key}
+
+
+def test_read_secrets():
+    text = "# database\nDB_PASSWORD=s3cr=t\n\n API_KEY = key with spaces\n"
+    assert encrypt_secret.read_secrets(text) == [
+        ("DB_PASSWORD", "s3cr=t"),
+        ("API_KEY", " key with spaces"),
+    ]
+    assert encrypt_secret.read_secrets('{"A": "a", "B": 1}') == [("A", "a"), ("B", "1")]
+
+    with pytest.raises(ValueError, match="line 2: expected NAME=SECRET"):
+        encrypt_secret.read_secrets("A=a\nB\n")
+    with pytest.raises(ValueError, match="duplicate names: A"):
+        encrypt_secret.read_secrets("A=a\nA=b\n")
+
+
+def test_encrypt_all_concurrently():
+    kms = KMS(delay=0.05)
+    secrets = [("S%d" % i, "secret %d" % i) for i in range(20)]
+    start = time.monotonic()
+    ciphertexts, errors = encrypt_secret.encrypt_all(kms, "alias/test", secrets, 4)
+    assert time.monotonic() - start < 0.5
+    assert kms.max_active == 4
+    assert not errors
+    assert list(ciphertexts.keys()) == [name for name, _ in secrets]
+    assert b64decode(ciphertexts["S3"]) == b"alias/test:secret 3"
+
+
+def test_encrypt_all_reports_errors():
+    kms = KMS(fail=(b"b",))
+    ciphertexts, errors = encrypt_secret.encrypt_all(
+        kms, "alias/test", [("A", "a"), ("B", "b")]
+    )
+    assert list(ciphertexts.keys()) == ["A"]
+    assert list(errors.keys()) == ["B"]
+
+
+def test_encrypt_all_envelopes():
+    kms = KMS()
+    large = "x" * (encrypt_secret.kms_limit + 1)
+    ciphertexts, errors = encrypt_secret.encrypt_all(
+        kms, "alias/test", [("A", "a"), ("B", large)]
+    )
+    assert not errors
+    assert b64decode(ciphertexts["A"]) == b"alias/test:a"
+    # a secret too large for KMS is encrypted in an envelope
+    assert len(kms.data_keys) == 1
+    blob = b64decode(ciphertexts["B"])
+    assert envelope.unseal(blob, lambda key: kms.data_keys[0]) == large.encode()
+
+    # all envelopes of a run share one data key
+    kms = KMS()
+    secrets = [("S%d" % i, "secret %d" % i) for i in range(10)]
+    ciphertexts, errors = encrypt_secret.encrypt_all(
+        kms, "alias/test", secrets, 4, use_envelope=True
+    )
+    assert not errors
+    assert len(kms.data_keys) == 1
+    for name, secret in secrets:
+        blob = b64decode(ciphertexts[name])
+        encrypted_data_key, _, _, _ = envelope.parse(blob)
+        assert encrypted_data_key == b"alias/test:" + kms.data_keys[0]
+        assert envelope.unseal(blob, lambda key: kms.data_keys[0]) == secret.encode()
+
+
+def test_format_ciphertexts():
+    ciphertexts = {"A": "YQ==", "B": "Yg=="}
+    assert json.loads(encrypt_secret.format_ciphertexts(ciphertexts, "json")) == {
+        "A": "YQ==",
+        "B": "Yg==",
+    }
+    assert json.loads(
+        encrypt_secret.format_ciphertexts(ciphertexts, "cloudformation")
+    ) == [
+        {"ParameterKey": "A", "ParameterValue": "YQ=="},
+        {"ParameterKey": "B", "ParameterValue": "Yg=="},
+    ]
@@ -0,0 +1,89 @@
+import string
+from collections import Counter
+
+import pytest
+
+import entropy
+
+
+def test_token_bytes():
+    assert len(entropy.token_bytes(0)) == 0
+    assert len(entropy.token_bytes(32)) == 32
+    assert entropy.token_bytes(32) != entropy.token_bytes(32)
+
+    # larger than a block is read directly
+    assert len(entropy.token_bytes(entropy.block_size + 1)) == entropy.block_size + 1
+
+
+def test_token_bytes_spans_blocks():
+    for _ in range(3 * entropy.block_size // 1000):
+        assert len(entropy.token_bytes(1000)) == 1000
+
+
+def test_randbelow():
+    for n in [1, 2, 7, 256, 257, 10 ** 12]:
+        for _ in range(100):
+            assert 0 <= entropy.randbelow(n) < n
+
+    with pytest.raises(ValueError):
+        entropy.randbelow(0)
+
+
+def test_choices():
+    alphabet = string.ascii_letters + string.digits + string.punctuation
+    for k in [0, 1, 30, 512]:
+        result = entropy.choices(alphabet, k)
+        assert len(result) == k
+        assert set(result) <= set(alphabet)
+
+    assert entropy.choices("a", 5) == ["a"] * 5
+
+    with pytest.raises(IndexError):
+        entropy.choices("", 1)
+
+
+def test_choices_from_other_alphabets():
+    # symbols which are not latin-1 characters are chosen by index
+    for alphabet in [["a", "bc", "d"], ("x", "y"), "αβγ", "é!ß"]:
+        result = entropy.choices(alphabet, 50)
+        assert len(result) == 50
+        assert set(result) == set(alphabet)
+
+
+def test_choices_from_large_alphabet():
+    alphabet = [chr(0x4E00 + i) for i in range(1000)]
+    result = entropy.choices(alphabet, 100)
+    assert len(result) == 100
+    assert set(result) <= set(alphabet)
+
+
+def test_choices_are_uniform():
+    # 10 does not divide 256, so a modulo bias would favour the first six digits
+    k = 100000
+    counts = Counter(entropy.choices(string.digits, k))
+    assert set(counts.keys()) == set(string.digits)
+    expected = k / 10
+    chi_square = sum((c - expected) ** 2 / expected for c in counts.values())
+    # the critical value for 9 degrees of freedom at p = 0.001 is 27.9
+    assert chi_square < 27.9
+
+
+def test_shuffle():
+    symbols = list(range(100))
+    entropy.shuffle(symbols)
+    assert sorted(symbols) == list(range(100))
+    assert symbols != list(range(100))
+
+    empty = []
+    entropy.shuffle(empty)
+    assert empty == []
+
+
+def test_shuffle_first_symbols():
+    positions = set()
+    for _ in range(200):
+        symbols = ["x"] + ["a"] * 29
+        entropy.shuffle(symbols, 1)
+        assert sorted(symbols) == ["a"] * 29 + ["x"]
+        positions.add(symbols.index("x"))
+    assert len(positions) > 10
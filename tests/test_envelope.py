@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import envelope
+
+
+def test_seal_and_unseal():
+    data_key = os.urandom(32)
+    blob = envelope.seal(data_key, b"encrypted data key", b"secret")
+    assert envelope.is_envelope(blob)
+    assert not envelope.is_envelope(b"a KMS ciphertext")
+
+    encrypted_data_keys = []
+
+    def decrypt_data_key(encrypted_data_key):
+        encrypted_data_keys.append(encrypted_data_key)
+        return data_key
+
+    assert envelope.unseal(blob, decrypt_data_key) == b"secret"
+    assert encrypted_data_keys == [b"encrypted data key"]
+    # every envelope has its own nonce
+    assert envelope.seal(data_key, b"encrypted data key", b"secret") != blob
+
+
+def test_unseal_tampered():
+    data_key = os.urandom(32)
+    blob = envelope.seal(data_key, b"encrypted data key", b"secret")
+    for offset in [len(envelope.magic) + 2, len(blob) - 1]:
+        tampered = bytearray(blob)
+        tampered[offset] ^= 1
+        with pytest.raises(ValueError, match="could not be decrypted"):
+            envelope.unseal(bytes(tampered), lambda _: data_key)
+
+    with pytest.raises(ValueError, match="could not be decrypted"):
+        envelope.unseal(blob, lambda _: os.urandom(32))
+
+
+def test_parse_invalid():
+    blob = envelope.seal(os.urandom(32), b"encrypted data key", b"secret")
+    with pytest.raises(ValueError, match="not an envelope"):
+        envelope.parse(b"a KMS ciphertext")
+    with pytest.raises(ValueError, match="not an envelope"):
+        envelope.parse(envelope.magic)
+    with pytest.raises(ValueError, match="truncated"):
+        envelope.parse(blob[:40])
+    with pytest.raises(ValueError, match="truncated"):
+        envelope.parse(envelope.header.pack(envelope.magic, 0) + bytes(64))
@@ -0,0 +1,52 @@
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from key_material import KeyMaterial
+
+key = rsa.generate_private_key(
+    public_exponent=65537, key_size=1024, backend=default_backend()
+)
+pkcs8 = key.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.PKCS8,
+    serialization.NoEncryption(),
+).decode("ascii")
+traditional = key.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.TraditionalOpenSSL,
+    serialization.NoEncryption(),
+).decode("ascii")
+
+
+def test_encodings():
+    material = KeyMaterial(key)
+    assert material.private_key(serialization.PrivateFormat.PKCS8) == pkcs8
+    assert (
+        material.private_key(serialization.PrivateFormat.TraditionalOpenSSL)
+        == traditional
+    )
+    assert material.openssh_public_key.startswith("ssh-rsa ")
+    assert material.public_key_pem.startswith("-----BEGIN PUBLIC KEY-----")
+
+
+def test_stored_pem_is_not_parsed_for_the_same_format():
+    material = KeyMaterial.from_pem(pkcs8)
+    assert material.private_key(serialization.PrivateFormat.PKCS8) is pkcs8
+    assert material._key is None
+
+    assert (
+        material.private_key(serialization.PrivateFormat.TraditionalOpenSSL)
+        == traditional
+    )
+    assert material._key is not None
+
+
+def test_key_is_parsed_once():
+    material = KeyMaterial.from_pem(traditional)
+    parsed = material.key
+    assert material.openssh_public_key == KeyMaterial(key).openssh_public_key
+    assert material.public_key_pem == KeyMaterial(key).public_key_pem
+    assert material.private_key(serialization.PrivateFormat.PKCS8) == pkcs8
+    assert material.key is parsed
+    assert material.openssh_public_key is material.openssh_public_key
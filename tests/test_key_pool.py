@@ -0,0 +1,86 @@
+import itertools
+import time
+from collections import deque
+
+from key_pool import KeyPool
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_pool_hits_after_first_miss():
+    counter = itertools.count()
+    pool = KeyPool("test key", lambda size, exponent: next(counter), 2)
+
+    assert pool.get(2048, 65537) == 0
+    assert (pool.hits, pool.misses) == (0, 1)
+
+    assert wait_for(lambda: len(pool.keys[(2048, 65537)]) == 2)
+    assert pool.get(2048, 65537) in [1, 2]
+    assert (pool.hits, pool.misses) == (1, 1)
+
+    # another specification misses
+    pool.get(4096, 65537)
+    assert (pool.hits, pool.misses) == (1, 2)
+    assert wait_for(lambda: len(pool.keys.get((4096, 65537), [])) == 2)
+
+
+def test_disabled_pool():
+    pool = KeyPool("test key", lambda size: object(), 0)
+    pool.get(2048)
+    pool.get(2048)
+    assert (pool.hits, pool.misses) == (0, 2)
+    assert pool._worker is None
+
+
+def test_failing_specification_is_not_pooled():
+    def generate(size):
+        if size < 1024:
+            raise ValueError("key size too small")
+        return size
+
+    pool = KeyPool("test key", generate, 2)
+    try:
+        pool.get(512)
+        assert False, "expected a ValueError"
+    except ValueError:
+        pass
+    assert (512,) not in pool.keys
+
+
+def test_no_background_generation_while_busy():
+    pool = KeyPool("test key", lambda size: size, 1)
+    pool.keys[(2048,)] = deque()
+    assert pool._next_spec() == (2048,)
+
+    with pool._condition:
+        pool._busy += 1
+    assert pool._next_spec() is None
+
+    with pool._condition:
+        pool._busy -= 1
+    assert pool._next_spec() == (2048,)
+
+
+def test_claim_before_generate():
+    claimable = ["claimed"]
+    pool = KeyPool(
+        "test key",
+        lambda size: "generated",
+        0,
+        claim=lambda size: claimable.pop() if claimable else None,
+    )
+    assert pool.get(2048) == "claimed"
+    assert pool.get(2048) == "generated"
+
+
+def test_failing_claim_falls_back_to_generate():
+    def claim(size):
+        raise RuntimeError("access denied")
+
+    pool = KeyPool("test key", lambda size: "generated", 0, claim=claim)
+    assert pool.get(2048) == "generated"
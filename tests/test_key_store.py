@@ -0,0 +1,104 @@
+import random
+import threading
+
+import cfn_rsakey_provider
+from api_calls import ApiCalls, client_error
+from key_store import InMemoryKeyStore, ParameterStoreKeyStore
+
+
+def test_prefix():
+    store = ParameterStoreKeyStore("/cfn-secret-provider/key-pool/")
+    assert store.prefix((2048, 65537)) == "/cfn-secret-provider/key-pool/2048-65537/"
+
+
+def test_parameter_store_claim(monkeypatch):
+    monkeypatch.setattr(random, "shuffle", lambda names: None)
+    store = ParameterStoreKeyStore("/key-pool")
+    parameters = {"/key-pool/2048-65537/a": "key-a", "/key-pool/2048-65537/b": "key-b"}
+    claimed_by_others = {"/key-pool/2048-65537/a"}
+
+    def get_parameter(params):
+        name = params["Name"]
+        return {"Parameter": {"Name": name, "Value": parameters[name]}}
+
+    def delete_parameter(params):
+        if params["Name"] in claimed_by_others:
+            raise client_error("ParameterNotFound", "DeleteParameter")
+        del parameters[params["Name"]]
+        return {}
+
+    ssm = {
+        "GetParametersByPath": lambda params: {
+            "Parameters": [{"Name": n, "Value": "encrypted"} for n in parameters]
+        },
+        "GetParameter": get_parameter,
+        "DeleteParameter": delete_parameter,
+    }
+    with ApiCalls(store.ssm, ssm) as c:
+        assert store.claim((2048, 65537)) == "key-b"
+    # the keys are listed without decryption, and only the claimed ones decrypted
+    assert c.calls[0] == (
+        "GetParametersByPath",
+        {"Path": "/key-pool/2048-65537/", "MaxResults": 10},
+    )
+    assert c.operations[1:] == ["GetParameter", "DeleteParameter"] * 2
+    assert parameters == {"/key-pool/2048-65537/a": "key-a"}
+
+    with ApiCalls(store.ssm, ssm) as c:
+        assert store.claim((2048, 65537)) is None
+    assert c.operations == ["GetParametersByPath", "GetParameter", "DeleteParameter"]
+
+
+def test_claim_removes_key():
+    store = InMemoryKeyStore()
+    assert store.claim((2048, 65537)) is None
+
+    store.put((2048, 65537), "key-1")
+    store.put((2048, 65537), "key-2")
+    assert store.count((2048, 65537)) == 2
+    assert store.count((4096, 65537)) == 0
+
+    claimed = {store.claim((2048, 65537)), store.claim((2048, 65537))}
+    assert claimed == {"key-1", "key-2"}
+    assert store.claim((2048, 65537)) is None
+
+
+def test_concurrent_claims_are_unique():
+    store = InMemoryKeyStore()
+    for i in range(100):
+        store.put((2048, 65537), "key-%d" % i)
+
+    claimed = []
+
+    def claim():
+        while True:
+            key = store.claim((2048, 65537))
+            if key is None:
+                return
+            claimed.append(key)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(claimed) == 100
+    assert len(set(claimed)) == 100
+
+
+def test_replenish_and_claim():
+    key_store = cfn_rsakey_provider.key_store
+    cfn_rsakey_provider.key_store = InMemoryKeyStore()
+    try:
+        response = cfn_rsakey_provider.replenish({"KeySize": 1024, "Count": 2}, {})
+        assert response == {"KeySize": 1024, "Available": 2, "Added": 2}
+
+        response = cfn_rsakey_provider.replenish({"KeySize": 1024, "Count": 2}, {})
+        assert response == {"KeySize": 1024, "Available": 2, "Added": 0}
+
+        key = cfn_rsakey_provider.claim_private_key(1024, 65537)
+        assert key.key_size == 1024
+        assert cfn_rsakey_provider.key_store.count((1024, 65537)) == 1
+    finally:
+        cfn_rsakey_provider.key_store = key_store
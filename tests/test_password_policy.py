@@ -0,0 +1,65 @@
+import string
+from collections import Counter
+
+import pytest
+
+import password_policy
+from password_policy import PasswordPolicy
+
+required = [
+    {"Count": 2, "Alphabet": string.ascii_uppercase},
+    {"Count": 1, "Alphabet": string.digits},
+]
+
+
+def test_generate():
+    policy = PasswordPolicy(string.ascii_lowercase, 30)
+    password = policy.generate()
+    assert len(password) == 30
+    assert set(password) <= set(string.ascii_lowercase)
+    assert policy.generate() != password
+
+
+def test_generate_required():
+    policy = password_policy.compile(string.ascii_lowercase, 3, required)
+    for _ in range(100):
+        password = policy.generate()
+        counts = Counter(c in string.ascii_uppercase for c in password)
+        assert counts[True] == 2
+        assert sum(c in string.digits for c in password) == 1
+
+
+def test_required_characters_are_shuffled():
+    policy = password_policy.compile(string.ascii_lowercase, 30, required)
+    positions = set()
+    for _ in range(200):
+        password = policy.generate()
+        positions.update(i for i, c in enumerate(password) if c in string.digits)
+    # the required digit is not always at the front of the password
+    assert len(positions) > 10
+
+
+def test_large_alphabet():
+    alphabet = "".join(chr(0x4E00 + i) for i in range(1000))
+    password = PasswordPolicy(alphabet, 64, [(2, "xyz")]).generate()
+    assert len(password) == 64
+    assert sum(c in "xyz" for c in password) == 2
+
+
+def test_impossible_policies():
+    with pytest.raises(ValueError) as e:
+        password_policy.compile(string.ascii_lowercase, 2, required)
+    assert str(e.value) == "the length should at least exceed the 3 required characters"
+
+    with pytest.raises(ValueError):
+        password_policy.compile("", 30)
+
+    with pytest.raises(ValueError):
+        password_policy.compile("abc", 30, [{"Count": 1, "Alphabet": ""}])
+
+
+def test_compiled_policies_are_cached():
+    a = password_policy.compile(string.ascii_letters, 30, [dict(r) for r in required])
+    b = password_policy.compile(string.ascii_letters, 30, [dict(r) for r in required])
+    assert a is b
+    assert password_policy.compile(string.ascii_letters, 31, required) is not a
@@ -0,0 +1,35 @@
+import property_changes
+from cfn_secret_provider import SecretProvider
+
+
+def provider(properties, old_properties=None):
+    request = {
+        "RequestType": "Update" if old_properties is not None else "Create",
+        "ResponseURL": "https://httpbin.org/put",
+        "StackId": "arn:aws:cloudformation:eu-central-1:123456789012:stack/test/guid",
+        "RequestId": "request-1",
+        "ResourceType": "Custom::Secret",
+        "LogicalResourceId": "Secret",
+        "ResourceProperties": properties,
+    }
+    if old_properties is not None:
+        request["OldResourceProperties"] = old_properties
+    result = SecretProvider()
+    result.set_request(request, {})
+    assert result.is_valid_request()
+    return result
+
+
+def test_unchanged():
+    names = ["Description", "KeyAlias"]
+    assert property_changes.unchanged(provider({"Name": "n"}, {"Name": "n"}), names)
+    assert property_changes.unchanged(
+        provider({"Name": "n", "KeyAlias": "alias/aws/ssm"}, {"Name": "n"}), names
+    )
+    assert not property_changes.unchanged(provider({"Name": "n"}), names)
+    assert not property_changes.unchanged(
+        provider({"Name": "n", "Description": "new"}, {"Name": "n"}), names
+    )
+    assert not property_changes.unchanged(
+        provider({"Name": "n"}, {"Name": "n", "KeyAlias": "alias/old"}), names
+    )
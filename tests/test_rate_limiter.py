@@ -0,0 +1,45 @@
+import threading
+import time
+
+from rate_limiter import TokenBucket
+
+
+def test_burst_is_not_delayed():
+    bucket = TokenBucket(5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_rate_is_limited():
+    bucket = TokenBucket(20, capacity=1)
+    start = time.monotonic()
+    threads = [
+        threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)])
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 20 tokens at 20 per second, of which the first is available immediately
+    assert time.monotonic() - start >= 0.9
+
+
+def test_acquire_times_out():
+    bucket = TokenBucket(2, capacity=1)
+    assert bucket.acquire(timeout=0)
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=0.1)
+    assert time.monotonic() - start < 0.05
+    assert bucket.acquire(timeout=1)
+
+
+def test_set_rate():
+    bucket = TokenBucket(100, capacity=10)
+    bucket.set_rate(10, drain=True)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+    assert bucket.rate == 10
@@ -0,0 +1,82 @@
+import base64
+import json
+import string
+
+import pytest
+
+from secret_template import SecretTemplate
+
+
+def test_render():
+    template = {
+        "username": "admin",
+        "password": {"Password": {"Length": "16", "Alphabet": string.digits}},
+        "token": {"Password": {}},
+        "salt": {"RandomBytes": {"Length": 16}},
+        "port": 5432,
+        "url": {"user": {"Field": "username"}, "password": {"Field": "password"}},
+        "hosts": ["a", {"Field": "port"}],
+        "literal": {"Password": "not generated"},
+    }
+    secret_template = SecretTemplate(template, string.ascii_letters, 30)
+    value = json.loads(secret_template.render())
+
+    assert list(value.keys()) == list(template.keys())
+    assert value["username"] == "admin"
+    assert len(value["password"]) == 16
+    assert set(value["password"]) <= set(string.digits)
+    assert len(value["token"]) == 30
+    assert set(value["token"]) <= set(string.ascii_letters)
+    assert len(base64.b64decode(value["salt"])) == 16
+    assert value["port"] == 5432
+    assert value["url"] == {"user": "admin", "password": value["password"]}
+    assert value["hosts"] == ["a", 5432]
+    assert value["literal"] == {"Password": "not generated"}
+
+    assert json.loads(secret_template.render())["password"] != value["password"]
+
+
+def test_required_defaults_to_the_secret():
+    required = [{"Count": 3, "Alphabet": "!"}]
+    template = {"password": {"Password": {"Length": 5}}}
+    value = json.loads(SecretTemplate(template, "a", 30, required).render())
+    assert sorted(value["password"]) == ["!", "!", "!", "a", "a"]
+
+
+def test_invalid_templates():
+    for template, message in [
+        ("not an object", "the content template must be a non-empty object"),
+        ({}, "the content template must be a non-empty object"),
+        (
+            {"a": {"Field": "b"}},
+            "a: the Field b should be a top-level field which does not refer to another field",
+        ),
+        (
+            {"a": {"Field": "b"}, "b": {"Field": "c"}, "c": 1},
+            "a: the Field b should be a top-level field which does not refer to another field",
+        ),
+        (
+            {
+                "a": [
+                    {
+                        "Password": {
+                            "Length": 0,
+                            "Required": [{"Count": 1, "Alphabet": "x"}],
+                        }
+                    }
+                ]
+            },
+            "a.0: invalid Password generator, the length should at least exceed the 1 required characters",
+        ),
+        (
+            {"a": {"RandomBytes": {"Length": 1024}}},
+            "a: invalid RandomBytes generator, the length should be between 1 and 512",
+        ),
+        (
+            {"a": {"Password": {"Length": "long"}}},
+            "a: invalid Password generator, invalid literal for int() with base 10: 'long'",
+        ),
+    ]:
+        with pytest.raises(ValueError) as e:
+            SecretTemplate(template, string.ascii_letters, 30)
+        assert str(e.value) == message
@@ -0,0 +1,53 @@
+import pytest
+
+import wordlist
+from wordlist import Wordlist
+
+words = ["abacus", "abdomen", "zoom", "ünïcode", "a"]
+
+
+def write_wordlist(tmp_path, words):
+    path = tmp_path / "wordlist.bin"
+    path.write_bytes(wordlist.build(words))
+    return str(path)
+
+
+def test_index(tmp_path):
+    w = Wordlist(write_wordlist(tmp_path, words))
+    assert len(w) == len(words)
+    assert [w[i] for i in range(len(w))] == words
+    with pytest.raises(IndexError):
+        w[len(words)]
+    with pytest.raises(IndexError):
+        w[-1]
+
+
+def test_invalid_files(tmp_path):
+    path = tmp_path / "wordlist.bin"
+    for content in [b"", b"not a word list at all", wordlist.build(words)[:-1]]:
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            Wordlist(str(path))
+
+
+def test_invalid_words():
+    with pytest.raises(ValueError):
+        wordlist.build(["a", "a"])
+    with pytest.raises(ValueError):
+        wordlist.build(["a", ""])
+
+
+def test_read_words():
+    lines = ["11111\tabacus\n", "\n", "11112 abdomen\n", "zoom\n"]
+    assert wordlist.read_words(lines) == ["abacus", "abdomen", "zoom"]
+
+
+def test_load_is_cached(tmp_path):
+    path = write_wordlist(tmp_path, words)
+    assert wordlist.load(path) is wordlist.load(path)
+
+
+def test_default_wordlist():
+    w = Wordlist(wordlist.default_path)
+    assert len(w) == 7776
+    assert (w[0], w[len(w) - 1]) == ("abacus", "zoom")
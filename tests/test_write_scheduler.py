@@ -0,0 +1,140 @@
+import json
+import time
+
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+import aws_clients
+import write_scheduler
+from api_calls import client_error
+from write_scheduler import WriteScheduler
+
+
+class SSM(object):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def put_parameter(self, **kwargs):
+        self.calls.append((time.monotonic(), kwargs))
+        if self.errors:
+            raise client_error(self.errors.pop(0), "PutParameter")
+        return {"Version": 1}
+
+
+class Context(object):
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining
+
+
+def test_throttled_writes_are_retried():
+    scheduler = WriteScheduler(rate=100, base_delay=0.01)
+    ssm = SSM(["ThrottlingException", "TooManyUpdates", "ThrottlingException"])
+    assert scheduler.put_parameter(ssm, Name="/test") == {"Version": 1}
+    assert len(ssm.calls) == 4
+    assert all(kwargs == {"Name": "/test"} for _, kwargs in ssm.calls)
+    # only throttling reduces the rate, which recovers on success
+    assert scheduler.bucket.rate == 25 + 10
+
+
+def test_other_errors_are_not_retried():
+    scheduler = WriteScheduler(rate=100, base_delay=0.01)
+    ssm = SSM(["ParameterAlreadyExists"])
+    with pytest.raises(Exception) as e:
+        scheduler.put_parameter(ssm, Name="/test")
+    assert e.value.response["Error"]["Code"] == "ParameterAlreadyExists"
+    assert len(ssm.calls) == 1
+    assert scheduler.bucket.rate == 100
+
+
+def test_retries_are_limited():
+    scheduler = WriteScheduler(rate=100, max_attempts=3, base_delay=0.01)
+    ssm = SSM(["ThrottlingException"] * 5)
+    with pytest.raises(Exception) as e:
+        scheduler.put_parameter(ssm, Name="/test")
+    assert e.value.response["Error"]["Code"] == "ThrottlingException"
+    assert len(ssm.calls) == 3
+    assert scheduler.bucket.rate == 12.5
+
+
+def test_retries_stop_at_the_deadline():
+    scheduler = WriteScheduler(rate=100, base_delay=10, max_delay=10)
+    ssm = SSM(["ThrottlingException"] * 5)
+    start = time.monotonic()
+    with pytest.raises(Exception) as e:
+        scheduler.put_parameter(ssm, time.monotonic() + 0.5, Name="/test")
+    assert e.value.response["Error"]["Code"] == "ThrottlingException"
+    assert time.monotonic() - start < 0.6
+    assert len(ssm.calls) < 5
+
+
+def test_no_capacity_before_the_deadline():
+    scheduler = WriteScheduler(rate=1)
+    ssm = SSM([])
+    scheduler.put_parameter(ssm, Name="/test")
+    with pytest.raises(Exception) as e:
+        scheduler.put_parameter(ssm, time.monotonic() + 0.1, Name="/test")
+    assert e.value.response["Error"]["Code"] == "ThrottlingException"
+    assert len(ssm.calls) == 1
+
+
+def test_deadline_of_context():
+    assert write_scheduler.deadline({}) is None
+    deadline = write_scheduler.deadline(Context(30000))
+    expected = time.monotonic() + 30 - write_scheduler.reserve
+    assert expected - 0.1 < deadline <= expected
+
+
+def test_transient_errors_are_retried():
+    scheduler = WriteScheduler(rate=100, base_delay=0.01)
+    ssm = SSM(["InternalServerError", "ServiceUnavailable"])
+    assert scheduler.put_parameter(ssm, Name="/test") == {"Version": 1}
+    assert len(ssm.calls) == 3
+    assert scheduler.bucket.rate == 100
+
+
+class Raw(object):
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def test_botocore_retries_are_disabled(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIALOCALSTANDIN")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "local-stand-in")
+    ssm = aws_clients.client("ssm", "eu-central-1")
+    writer = write_scheduler.client(ssm)
+    assert writer is write_scheduler.client(ssm)
+    assert writer is not ssm
+
+    # the responses of the requests sent by botocore, after its retry handler
+    responses = []
+
+    def send(request, **kwargs):
+        status, body = responses.pop(0)
+        if status is None:
+            raise EndpointConnectionError(endpoint_url=request.url)
+        return AWSResponse(request.url, status, {}, Raw(json.dumps(body).encode()))
+
+    writer.meta.events.register("before-send.ssm.PutParameter", send)
+    throttled = (400, {"__type": "ThrottlingException", "message": "Rate exceeded"})
+    server_error = (500, {"__type": "InternalServerError", "message": ""})
+    written = (200, {"Version": 1, "Tier": "Standard"})
+
+    for response in [throttled, server_error]:
+        responses[:] = [response, written]
+        with pytest.raises(ClientError):
+            writer.put_parameter(Name="/test", Value="v", Type="String")
+        assert responses == [written]
+
+    responses[:] = [throttled, server_error, (None, None), written]
+    scheduler = WriteScheduler(rate=100, base_delay=0.01)
+    assert scheduler.put_parameter(writer, Name="/test", Value="v")["Version"] == 1
+    assert responses == []
+    assert scheduler.bucket.rate == 50 + 10